@@ -0,0 +1,126 @@
+''' Threshold cascades of many seed sets at once, with numpy and scipy.
+
+The seed sets are the columns of an n x k 0/1 matrix. Every step multiplies the
+sparse adjacency matrix with the people infected on the previous step of every
+cascade still running, so thousands of seed sets cost a few sparse products per
+step instead of one python cascade each. A column stops as soon as its step
+infects nobody new. The results are the same as cascade.simulate.
+
+numpy and scipy are only needed by this module, see greedy.try_solutions for
+the fallback without them.
+'''
+import argparse
+import numpy as np
+from scipy import sparse
+from social_network import load
+
+def adjacency(edges, n=None):
+    ''' Sparse n x n 0/1 matrix of the friendships, from an edges dict or a csr_graph.CSRGraph '''
+    n = len(edges) if n is None else n
+    if hasattr(edges, 'offsets'):
+        offsets = np.frombuffer(edges.offsets, dtype=np.int64)
+        neighbours = np.frombuffer(edges.neighbours, dtype=np.int32)
+    else:
+        degrees = [len(edges.get(i, ())) for i in range(n)]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        neighbours = np.fromiter((j for i in range(n) for j in edges.get(i, ())), dtype=np.int32, count=offsets[-1])
+    return sparse.csr_matrix((np.ones(len(neighbours), dtype=np.int32), neighbours, offsets), shape=(n, n))
+
+def seed_matrix(seed_sets, n):
+    ''' n x k boolean matrix with a column per seed set (lists of people) '''
+    seeds = np.zeros((n, len(seed_sets)), dtype=bool)
+    for column, seed_set in enumerate(seed_sets):
+        seeds[list(seed_set), column] = True
+    return seeds
+
+def simulate(edges, seeds, m, n=None, matrix=None):
+    ''' Runs the cascades of all the seed sets until each one reaches its fixed point
+    edges  : friendship graph
+    seeds  : n x k boolean matrix, column c holds the seeds of the c-th cascade (see seed_matrix)
+    m      : minimum number of people needed to infected new person
+    matrix : adjacency(edges, n), to reuse it over many calls
+    returns (coverage, activation) where coverage[c] is the number of people infected at the end
+    of cascade c and activation[i, c] the step person i got infected on, -1 if they never are
+    '''
+    n = seeds.shape[0] if n is None else n
+    matrix = adjacency(edges, n) if matrix is None else matrix
+    infected = np.array(seeds, dtype=bool)
+    activation = np.where(infected, 0, -1).astype(np.int32)
+    if m <= 0:
+        # everybody gets infected on the first step
+        activation[~infected] = 1
+        return np.full(infected.shape[1], n), activation
+    # the state of the cascades still spreading, the others are copied out when they stop
+    running = np.arange(infected.shape[1])
+    spread_infected, spread_activation = infected, activation.copy()
+    count = np.zeros(infected.shape, dtype=np.int32)
+    new = infected
+    step = 0
+    while running.size:
+        step += 1
+        count += matrix @ new.astype(np.int32)
+        new = (count >= m) & ~spread_infected
+        spread_infected |= new
+        spread_activation[new] = step
+        spreading = new.any(axis=0)
+        if not spreading.all():
+            stopped = ~spreading
+            infected[:, running[stopped]] = spread_infected[:, stopped]
+            activation[:, running[stopped]] = spread_activation[:, stopped]
+            running = running[spreading]
+            spread_infected, spread_activation = spread_infected[:, spreading], spread_activation[:, spreading]
+            count, new = count[:, spreading], new[:, spreading]
+    return infected.sum(axis=0), activation
+
+def solution_seeds(filename):
+    ''' Seeds of a gurobi solution file with named columns (the superpack ones or ip_solver.py --names),
+    the people whose x[i,0] is 1
+    '''
+    seeds = []
+    with open(filename) as file:
+        for line in file:
+            items = line.split()
+            if len(items) == 2 and items[0].startswith('x[') and items[0].endswith(',0]') and float(items[1]) > 0.5:
+                seeds.append(int(items[0][2:-3]))
+    return seeds
+
+def perturbed(seeds, drop, samples, rng):
+    ''' samples copies of the seed matrix where every seed is dropped with probability drop '''
+    n, k = seeds.shape
+    copies = np.repeat(seeds, samples, axis=1)
+    return copies & (rng.random((n, k * samples)) >= drop)
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Run the threshold cascade of many seed sets at once')
+    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    parser.add_argument('friends_file', help='file defining the social network')
+    parser.add_argument('--seeds', help='file with one seed set per line, people separated by spaces')
+    parser.add_argument('--solutions', nargs='+', default=[], help='solution files written by the solvers (.sol)')
+    parser.add_argument('--drop', type=float, help='also run every seed set with each seed dropped with this probability')
+    parser.add_argument('--samples', type=int, default=100, help='number of runs of each seed set with --drop (default: 100)')
+    parser.add_argument('--seed', type=int, help='seed of the random generator of --drop')
+    args = parser.parse_args()
+
+    edges,n = load(args.friends_file)
+    names, seed_sets = [], []
+    if args.seeds:
+        with open(args.seeds) as file:
+            for line in file:
+                names.append('line '+str(len(names)+1))
+                seed_sets.append([int(item) for item in line.split()])
+    for filename in args.solutions:
+        names.append(filename)
+        seed_sets.append(solution_seeds(filename))
+    seeds = seed_matrix(seed_sets, n)
+    matrix = adjacency(edges, n)
+    coverage, activation = simulate(edges, seeds, args.m, n, matrix)
+    last = activation.max(axis=0)
+    for c, name in enumerate(names):
+        print(name+': '+str(len(seed_sets[c]))+' seeds infect '+str(coverage[c])+' people in '+str(last[c])+' steps')
+    if args.drop:
+        samples, _ = simulate(edges, perturbed(seeds, args.drop, args.samples, np.random.default_rng(args.seed)), args.m, n, matrix)
+        samples = samples.reshape(len(names), args.samples)
+        for c, name in enumerate(names):
+            print(name+' dropping seeds with probability '+str(args.drop)+': '+str(round(samples[c].mean(), 2))+
+                  ' people on average, '+str(samples[c].min())+' at worst')
@@ -1,8 +1,10 @@
 import random_graph_generator
 import argparse
+import ip_solver
+import solve_service
 from subprocess import call
 
-def run(I, n, m, M, greedy):
+def run(I, n, m, M, greedy, backend='gurobi', service=None):
     for i in range(I):
         # create a random graph and write it to random_graph_i.txt
         greedy_str = 'greedy' if greedy else ''
@@ -10,9 +12,11 @@ def run(I, n, m, M, greedy):
         sol_filename = 'random_graph_'+str(i)+'_'+greedy_str+'_solution.txt'
         log_filename = 'random_graph_'+str(i)+'_'+greedy_str+'_log.txt'
         random_graph_generator.generate( filename, n)
-        greedy_opt = '--greedy' if greedy else ' '
         # read the file to optimizer
-        call('gurobi.sh gurobi_ip_project.py '+str(m)+' '+ str(M)+' '+filename+' -o '+sol_filename+' -l '+log_filename+' '+greedy_opt, shell=True)
+        if service:
+            solve_service.run(service, backend, m, M, filename, sol_filename, log_filename, greedy)
+        else:
+            call(ip_solver.command(backend, m, M, filename, sol_filename, log_filename, greedy), shell=True)
     
 if __name__=='__main__':
     parser = argparse.ArgumentParser(description='Generate n random undirected social network graphs and then solve to find minimum number of people to infect M people after n iterations')
@@ -21,10 +25,12 @@ if __name__=='__main__':
     parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
     parser.add_argument('M', type=int, help='minimum number of people who we want to have installed the app')
     parser.add_argument('--greedy', action='store_true', help='seed the problem with an initial feasible solution using greedy algorithm')
+    parser.add_argument('--backend', default='gurobi', choices=sorted(ip_solver.BACKENDS), help='solver used (default: gurobi)')
+    parser.add_argument('--service', type=solve_service.parse_address, help='host:port of a running solve_service.py to solve the graphs with, instead of a new process each')
 
     args = parser.parse_args()
     
     I, n, m, M = args.I, args.n, args.m, args.M
-    run(I, n, m, M, True)
-    run(I, n, m, M, False)
+    run(I, n, m, M, True, args.backend, args.service)
+    run(I, n, m, M, False, args.backend, args.service)
     
\ No newline at end of file
@@ -0,0 +1,150 @@
+''' Reproducible benchmark of the phases of a solve.
+
+Every instance of the corpus is a G(n,p) graph drawn with a fixed seed, so the
+same corpus is measured on every machine. Each phase is timed on its own (best
+of --repeat runs) and measured once more under tracemalloc for its peak
+memory. The results can be saved as a baseline and later runs compared with
+it: a phase slower than the baseline by more than the tolerance is flagged as
+a regression. The solve phase uses HiGHS by default so no license is needed.
+'''
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+from random import Random
+from time import perf_counter
+import random_graph_generator
+from formulation import build_formulation
+from greedy import find_greedy_solution, find_celf_solution, try_solution
+from horizon import estimate_horizon
+from ip_solver import BACKENDS, get_backend
+from social_network import load
+from telemetry import quiet
+
+# (n, p, m), the model of the instances with n up to BUILD_LIMIT is built
+# and the ones with n up to SOLVE_LIMIT are also solved
+CORPUS = [(n, p, m) for n in (12, 16, 20, 200, 2000) for p in (0.15, 0.3) for m in (2, 3)]
+QUICK_CORPUS = [(n, p, m) for n in (12, 200) for p in (0.15, 0.3) for m in (2, 3)]
+BUILD_LIMIT = 200
+SOLVE_LIMIT = 16
+PHASES = ['load', 'greedy', 'celf', 'simulate', 'formulation', 'model', 'solve']
+
+def instance_name(n, p, m):
+    return 'n'+str(n)+'_p'+str(p)+'_m'+str(m)
+
+def write_instance(filename, n, p, seed):
+    ''' Writes the G(n,p) graph drawn with the seed '''
+    with open(filename, 'w') as file:
+        file.write(str(n)+'\n')
+        for i,j in random_graph_generator.gnp_edges(n, p, Random(seed)):
+            file.write(str(i)+' '+str(j)+'\n')
+
+def measure(function, repeat):
+    ''' (best time in seconds, peak memory in bytes, result) of calling the function '''
+    best = None
+    for r in range(repeat):
+        start = perf_counter()
+        result = function()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+def benchmark_instance(filename, n, m, backend, repeat):
+    ''' Measures every phase on one instance, returns {phase: {'seconds', 'peak'}} '''
+    solver = get_backend(backend)
+    M = int(0.8*n)
+    phases = {}
+
+    def run(name, function):
+        seconds, peak, result = measure(function, repeat)
+        phases[name] = {'seconds': seconds, 'peak': peak}
+        return result
+
+    edges,n = run('load', lambda: load(filename))
+    f = [len(edges[i]) for i in range(n)]
+    solution = run('greedy', lambda: find_greedy_solution(edges, f, m, M))
+    run('celf', lambda: find_celf_solution(edges, f, m, M))
+    run('simulate', lambda: try_solution(edges, solution, m))
+    if n > BUILD_LIMIT:
+        return phases
+    T = estimate_horizon(edges, n, m)
+    formulation = run('formulation', lambda: build_formulation(edges, n, M, m, T))
+    run('model', lambda: solver.to_model(formulation))
+    if n <= SOLVE_LIMIT:
+
+        def solve():
+            model = solver.to_model(formulation)
+            solver.setup(model, threads=1)
+            if backend == 'highs':
+                model.setOptionValue('output_flag', False)
+            return solver.optimize(model, formulation)
+        solution = run('solve', solve)
+        phases['solve']['objective'] = solution.objective
+    return phases
+
+def benchmark(corpus=CORPUS, backend='highs', repeat=3, seed=0):
+    ''' Measures the corpus, returns {instance: {phase: {'seconds', 'peak'}}} '''
+    results = {}
+    folder = tempfile.mkdtemp()
+    for index, (n, p, m) in enumerate(corpus):
+        name = instance_name(n, p, m)
+        filename = os.path.join(folder, name+'.txt')
+        write_instance(filename, n, p, seed + index)
+        # the models print their progress
+        with quiet():
+            results[name] = benchmark_instance(filename, n, m, backend, repeat)
+        os.remove(filename)
+        print(name+': '+', '.join(phase+' '+str(round(results[name][phase]['seconds'], 4))+'s'
+                                  for phase in PHASES if phase in results[name]))
+    os.rmdir(folder)
+    return results
+
+def compare(results, baseline, tolerance=0.25, minimum=0.01):
+    ''' Phases slower than the baseline by more than the tolerance, as (instance, phase, seconds, baseline seconds)
+    minimum : phases faster than this many seconds are too noisy to compare
+    '''
+    regressions = []
+    for name, phases in results.items():
+        for phase, measures in phases.items():
+            before = baseline.get(name, {}).get(phase)
+            if before is None or max(measures['seconds'], before['seconds']) < minimum:
+                continue
+            if measures['seconds'] > before['seconds'] * (1 + tolerance):
+                regressions.append((name, phase, measures['seconds'], before['seconds']))
+    return regressions
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the load, greedy, simulation, model building and solve phases on a seeded corpus')
+    parser.add_argument('-o', '--output', help='write the results to a json file')
+    parser.add_argument('--save', help='save the results as the baseline file')
+    parser.add_argument('--compare', help='baseline file to compare the results with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative slowdown flagged as a regression (default: 0.25)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each phase, the best is kept (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first instance of the corpus (default: 0)')
+    parser.add_argument('--quick', action='store_true', help='only run a small part of the corpus')
+    parser.add_argument('--backend', default='highs', choices=sorted(BACKENDS), help='solver used (default: highs)')
+    args = parser.parse_args()
+
+    results = benchmark(QUICK_CORPUS if args.quick else CORPUS, args.backend, args.repeat, args.seed)
+    report = {'backend': args.backend, 'seed': args.seed, 'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              'results': results}
+    for filename in (args.output, args.save):
+        if filename:
+            with open(filename, 'w') as file:
+                json.dump(report, file, indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for name, phase, seconds, before in regressions:
+            print('Regression '+name+' '+phase+': '+str(round(seconds, 4))+'s instead of '+str(round(before, 4))+'s')
+        if regressions:
+            sys.exit(1)
+        print('No regression against '+args.compare)
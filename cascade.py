@@ -0,0 +1,180 @@
+''' Threshold cascade over a friendship graph.
+
+A person installs the app on step t if at least m of their friends had it
+installed on step t-1. Once installed it stays installed.
+'''
+import heapq
+
+def _propagate(edges, m, activation, count, frontier, step):
+    ''' Spreads the app from the newly infected people until nothing changes
+    edges       : friendship graph
+    m           : minimum number of people needed to infected new person
+    activation  : activation[i] is the step person i got infected (None if not infected), updated in place
+    count       : count[i] is the number of infected friends of person i, updated in place
+    frontier    : people infected on the given step whose friends have not been told yet
+    step        : step at which the frontier was infected
+    returns (number of newly infected people, last step on which someone got infected)
+    '''
+    infected = 0
+    last = step
+    while frontier:
+        step += 1
+        next_frontier = []
+        for i in frontier:
+            for j in edges.get(i, ()):
+                if activation[j] is None:
+                    count[j] += 1
+                    if count[j] >= m:
+                        activation[j] = step
+                        next_frontier.append(j)
+        if next_frontier:
+            infected += len(next_frontier)
+            last = step
+        frontier = next_frontier
+    return infected, last
+
+def simulate(edges, seeds, m, n=None):
+    ''' Runs the cascade started by a set of seeds until it reaches its fixed point
+    edges       : friendship graph
+    seeds       : iterable of initially infected people
+    m           : minimum number of people needed to infected new person
+    n           : number of people (default: len(edges))
+    returns (number of people infected at the end, activation) where activation[i]
+    is the step on which person i got infected or None if they never do
+    '''
+    n = len(edges) if n is None else n
+    activation = [None] * n
+    count = [0] * n
+    frontier = []
+    for i in seeds:
+        if activation[i] is None:
+            activation[i] = 0
+            frontier.append(i)
+    infected = len(frontier)
+    if m <= 0:
+        # everybody gets infected on the first step
+        for i in range(n):
+            if activation[i] is None:
+                activation[i] = 1
+                infected += 1
+        return infected, activation
+    newly_infected, _ = _propagate(edges, m, activation, count, frontier, 0)
+    return infected + newly_infected, activation
+
+class _Overlay(dict):
+    ''' Records writes to a list without touching the list itself '''
+    def __init__(self, base):
+        dict.__init__(self)
+        self.base = base
+
+    def __missing__(self, key):
+        return self.base[key]
+
+class Cascade:
+    ''' Cascade state that grows and shrinks as seeds are added and removed.
+
+    Adding seeds to the fixed point of a cascade reaches the same fixed point
+    as restarting from all the seeds at once, so only the people reached from
+    the new seeds are visited. The steps go on from one call to the next, so
+    everybody got infected on a later step than the friends that infected them,
+    which is what remove relies on. count[i] is only kept for the people not
+    infected.
+    '''
+    def __init__(self, edges, m, n=None):
+        self.edges = edges
+        self.m = m
+        self.n = len(edges) if n is None else n
+        self.activation = [None] * self.n
+        self.count = [0] * self.n
+        self.infected = 0
+        self.seeds = set()
+        # step of the next seeds
+        self.step = 0
+        if m <= 0:
+            self.activation = [1] * self.n
+            self.infected = self.n
+
+    def _spread(self, seeds, activation, count):
+        ''' returns (number of newly infected people, last step) '''
+        frontier = []
+        for i in seeds:
+            if activation[i] is None:
+                activation[i] = self.step
+                frontier.append(i)
+        newly_infected, last = _propagate(self.edges, self.m, activation, count, frontier, self.step)
+        return len(frontier) + newly_infected, last
+
+    def gain(self, seeds, footprint=None):
+        ''' Number of people that adding the seeds would infect, the state is left untouched
+        footprint : set the people the seeds would infect and their friends not infected are added to,
+                    the gain stays the same until someone next to one of them gets infected
+        '''
+        activation, count = _Overlay(self.activation), _Overlay(self.count)
+        gained = self._spread(seeds, activation, count)[0]
+        if footprint is not None:
+            footprint.update(activation)
+            footprint.update(count)
+        return gained
+
+    def add(self, seeds):
+        ''' Adds the seeds and returns the number of newly infected people '''
+        seeds = list(seeds)
+        self.seeds.update(seeds)
+        gained, last = self._spread(seeds, self.activation, self.count)
+        self.step = last + 1
+        self.infected += gained
+        return gained
+
+    def remove(self, seeds):
+        ''' Removes seeds and returns the number of people no longer infected
+
+        The people keep their infection while m of the friends infected on an
+        earlier step keep theirs, so they are checked in the order of their steps
+        from the removed seeds, and only the friends infected after a person who
+        lost it are checked next. The ones that lost it are infected again when
+        they have m infected friends left and spread, so only this part of the
+        cascade is visited.
+        '''
+        removed = [i for i in seeds if i in self.seeds]
+        self.seeds.difference_update(removed)
+        if self.m <= 0 or not removed:
+            return 0
+        edges, activation, count, m = self.edges, self.activation, self.count, self.m
+        lost = set()
+        checked = set(removed)
+        heap = [(activation[i], i) for i in removed]
+        heapq.heapify(heap)
+        while heap:
+            step, i = heapq.heappop(heap)
+            earlier = 0
+            for j in edges.get(i, ()):
+                if activation[j] is not None and activation[j] < step and j not in lost:
+                    earlier += 1
+                    if earlier >= m:
+                        break
+            if earlier >= m:
+                continue
+            lost.add(i)
+            for j in edges.get(i, ()):
+                if j not in checked and j not in self.seeds and activation[j] is not None and activation[j] > step:
+                    checked.add(j)
+                    heapq.heappush(heap, (activation[j], j))
+        for i in lost:
+            activation[i] = None
+        for i in lost:
+            infected_friends = 0
+            for j in edges.get(i, ()):
+                if activation[j] is None:
+                    if j not in lost:
+                        count[j] -= 1
+                else:
+                    infected_friends += 1
+            count[i] = infected_friends
+        frontier = [i for i in lost if count[i] >= self.m]
+        for i in frontier:
+            activation[i] = self.step
+        newly_infected, last = _propagate(edges, self.m, activation, count, frontier, self.step)
+        self.step = last + 1
+        dropped = len(lost) - len(frontier) - newly_infected
+        self.infected -= dropped
+        return dropped
@@ -0,0 +1,72 @@
+''' Checkpoint of a long solve, to resume it once the process was killed.
+
+The checkpoint is a small json file with the best seeds found so far, their
+objective and the best bound of the solver. It listens to the telemetry of the
+solve (see telemetry.py): every better incumbent with its seeds is written at
+once and the bound at most every interval seconds. A solve started again with
+the same checkpoint file on the same graph and parameters builds its model with
+the seeds as MIP start and the bound as the ObjectiveBound row, instead of
+starting from scratch. A checkpoint of another solve is ignored.
+'''
+import json
+import os
+from time import time
+
+class Checkpoint:
+    ''' Best incumbent and bound of a solve, kept in a file
+
+    key      : result_cache.cache_key of the solve
+    interval : minimum seconds between two writes of a better bound
+    '''
+    def __init__(self, filename, key, interval=30.0):
+        self.filename = filename
+        self.interval = interval
+        self.state = {'key': key, 'T': None, 'objective': None, 'seeds': None, 'bound': None}
+        previous = load(filename)
+        if previous and previous.get('key') == key:
+            self.state.update(previous)
+            print('Resuming from the checkpoint '+filename+': objective '+str(self.state['objective'])+
+                  ', bound '+str(self.state['bound']))
+        self._written = None
+
+    def resume(self, T):
+        ''' (seeds, bound) to start the model with last period T from, None for what is unknown
+
+        More periods can only lower the optimum, so the bound of a model with at
+        least T periods holds for T. The seeds are only a start, they may not
+        reach M people in T periods.
+        '''
+        state = self.state
+        if state['T'] is None or state['T'] < T:
+            state['bound'] = None
+        state['T'] = T
+        return state['seeds'], state['bound']
+
+    def listen(self, record):
+        ''' Telemetry listener keeping the incumbents with seeds and the best bound '''
+        state = self.state
+        if record['event'] == 'solution' and record.get('seeds') is not None:
+            if state['objective'] is None or record['objective'] < state['objective']:
+                state['objective'] = record['objective']
+                state['seeds'] = record['seeds']
+                self.save()
+        elif record['event'] == 'progress' and record['bound'] is not None:
+            if state['bound'] is None or record['bound'] > state['bound']:
+                state['bound'] = record['bound']
+                if self._written is None or time() - self._written >= self.interval:
+                    self.save()
+
+    def save(self):
+        ''' Writes the checkpoint, then renames it so a kill never leaves half a file '''
+        with open(self.filename+'.tmp', 'w') as file:
+            json.dump(self.state, file)
+        os.replace(self.filename+'.tmp', self.filename)
+        self._written = time()
+
+def load(filename):
+    ''' State of a checkpoint file as a dict, None if there is none '''
+    try:
+        with open(filename) as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return None
@@ -0,0 +1,126 @@
+''' Compact binary friendship graphs in CSR form.
+
+The file starts with the magic bytes, the number of people n and the number of
+neighbour entries, followed by n+1 offsets (int64) and the neighbours (int32).
+The friends of person i are neighbours[offsets[i]:offsets[i+1]], sorted.
+
+Loading memory-maps the file and the arrays are read from the mapping without
+copying, so worker processes loading the same graph share its pages.
+'''
+import argparse
+import mmap
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b'SNCSR1\0\0'
+HEADER = len(MAGIC) + 16
+
+class CSRGraph(Mapping):
+    ''' Friendship graph backed by CSR arrays, usable wherever the edges dict is.
+
+    graph[i] is a read-only memoryview of the friends of person i.
+    '''
+    def __init__(self, n, offsets, neighbours, buffer=None):
+        self.n = n
+        self.offsets = offsets
+        self.neighbours = neighbours
+        # keeps the memory map open while the arrays are used
+        self._buffer = buffer
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise KeyError(i)
+        return self.neighbours[self.offsets[i]:self.offsets[i+1]]
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+    def degree(self, i):
+        return self.offsets[i+1] - self.offsets[i]
+
+def _read_edges(file):
+    ''' Yields the friendships of a text edge list, skipping the n header line '''
+    with open(file) as f:
+        for line in f:
+            items = line.split()
+            if len(items) == 2:
+                yield int(items[0]), int(items[1])
+
+def convert(text_file, csr_file):
+    ''' Converts a text edge list (see social_network.load) into a CSR file
+    returns the number of people
+    '''
+    # first pass: number of people and friends of each person
+    n = 0
+    with open(text_file) as f:
+        for line in f:
+            items = line.split()
+            if len(items) == 1:
+                n = max(n, int(items[0]))
+            elif len(items) == 2:
+                n = max(n, int(items[0]) + 1, int(items[1]) + 1)
+    degree = array('q', [0]) * (n + 1)
+    for i, j in _read_edges(text_file):
+        degree[i] += 1
+        degree[j] += 1
+
+    # second pass: fill the neighbours of each person
+    offsets = array('q', [0]) * (n + 1)
+    for i in range(n):
+        offsets[i+1] = offsets[i] + degree[i]
+    fill = array('q', offsets)
+    neighbours = array('i', [0]) * offsets[n]
+    for i, j in _read_edges(text_file):
+        neighbours[fill[i]] = j
+        fill[i] += 1
+        neighbours[fill[j]] = i
+        fill[j] += 1
+
+    # sort the friends and drop repeated friendships
+    size = 0
+    start = 0
+    for i in range(n):
+        end = offsets[i+1]
+        friends = sorted(set(neighbours[start:end]))
+        offsets[i] = size
+        neighbours[size:size+len(friends)] = array('i', friends)
+        size += len(friends)
+        start = end
+    offsets[n] = size
+    del neighbours[size:]
+
+    with open(csr_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(array('q', [n, size]).tobytes())
+        offsets.tofile(f)
+        neighbours.tofile(f)
+    return n
+
+def is_csr(file):
+    with open(file, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def load_csr(file):
+    ''' Memory-maps a CSR file
+    returns (graph, n) like social_network.load
+    '''
+    with open(file, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    n, size = view[len(MAGIC):HEADER].cast('q')
+    offsets = view[HEADER:HEADER + 8*(n+1)].cast('q')
+    start = HEADER + 8*(n+1)
+    neighbours = view[start:start + 4*size].cast('i')
+    return (CSRGraph(n, offsets, neighbours, buffer), n)
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Convert a text friendship graph into the binary CSR format')
+    parser.add_argument('friends_file', help='text file defining the social network')
+    parser.add_argument('output', help='CSR file to write')
+    args = parser.parse_args()
+
+    n = convert(args.friends_file, args.output)
+    print('Wrote '+str(n)+' people to '+args.output)
@@ -0,0 +1,190 @@
+''' Solves the problem one connected component at a time.
+
+A cascade never crosses from one connected component to another. For every
+component the fewest seeds reaching each number of its
+people are found once (its curve), with a closed form for the small cases and
+one IP solve per point of the curve for the others, the components solved in
+parallel. A knapsack over the curves then picks the fewest seeds reaching M
+people in total, the optimum of the model of the whole graph.
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+from formulation import build_formulation, Solution
+from telemetry import quiet
+
+def components(edges, n):
+    ''' Connected components of the friendship graph, largest first
+    returns a list of sorted lists of people, people without friends are components on their own
+    '''
+    seen = [False] * n
+    result = []
+    for i in range(n):
+        if seen[i]:
+            continue
+        seen[i] = True
+        people = []
+        stack = [i]
+        while stack:
+            k = stack.pop()
+            people.append(k)
+            for j in edges.get(k, ()):
+                if not seen[j]:
+                    seen[j] = True
+                    stack.append(j)
+        result.append(sorted(people))
+    result.sort(key=lambda people: -len(people))
+    return result
+
+def subgraph(edges, ids):
+    ''' Friendships of a component renumbered 0,...,len(ids)-1
+    returns (ids, edges) where ids[k] is the original id of the k-th person
+    '''
+    index = {i: k for k, i in enumerate(ids)}
+    return ids, {k: set(index[j] for j in edges.get(i, ()) if j in index) for k, i in enumerate(ids)}
+
+def closed_curve(edges, people, m):
+    ''' Curve of a component found without solving, None if there is no closed form
+
+    With fewer than m seeds nobody else gets infected, so s < m seeds reach s
+    people. When every person is friends with all the others, m seeds infect
+    everybody on the next period, and a component with fewer than m people
+    only reaches its seeds.
+    '''
+    if m <= 0:
+        return None
+    if any(len(edges.get(i, ())) < len(people) - 1 for i in people):
+        return None
+    curve = [(people[:s], dict.fromkeys(people[:s], 0)) for s in range(min(m, len(people) + 1))]
+    if len(people) < m:
+        return curve
+    activation = dict.fromkeys(people, 1)
+    activation.update(dict.fromkeys(people[:m], 0))
+    return curve + [(people[:m], activation)]
+
+def solve_curve(job):
+    ''' Curve of a component from one IP solve per point
+
+    job : (ids, edges, m, backend, horizon, lazy, compact) where ids and edges are the component, see subgraph
+    returns (curve, optimal, statistics of the solves), see curve
+    '''
+    from horizon import estimate_horizon
+    from ip_solver import get_backend
+    ids, edges, m, backend, horizon, lazy, compact = job
+    n = len(ids)
+    stats = {'solves': 0, 'nodes': 0, 'iterations': 0}
+    optimal = True
+    # fewer than m seeds only reach themselves
+    curve = [(ids[:s], dict.fromkeys(ids[:s], 0)) for s in range(max(0, min(m, n+1)))]
+    target = len(curve[-1][1]) + 1 if curve else 1
+    # the backends print their logs
+    with quiet():
+        solver = get_backend(backend)
+        formulation = build_formulation(edges, n, target, m, estimate_horizon(edges, n, m, horizon), lazy=lazy,
+                                        minimum_seeds=0, compact=compact)
+        model = solver.to_model(formulation)
+        solver.setup(model, threads=1)
+        while target <= n:
+            if target != formulation.M:
+                solver.retarget(model, formulation, target)
+            solution = solver.optimize(model, formulation)
+            stats['solves'] += 1
+            for field in ('nodes', 'iterations'):
+                stats[field] += solution.stats.get(field) or 0
+            if solution.seeds is None:
+                break
+            optimal = optimal and solution.status == 'optimal'
+            activation = {ids[k]: period for k, period in enumerate(solution.activation) if period is not None}
+            curve.append(([ids[k] for k in solution.seeds], activation))
+            target = len(activation) + 1
+        solver.close(model)
+    return curve, optimal, stats
+
+def combine(curves, m, M):
+    ''' Picks a point of every curve, with the fewest seeds in total reaching at least M people,
+    then the most people reached, and at least m seeds (constraint 6 of the whole model)
+
+    curves : list of curves, the points sorted by number of seeds and starting with no seeds
+    returns (point of every curve, number of seeds) or None if M people cannot be reached
+    '''
+    # reach[S] is the most people reached with at most S seeds by the curves seen so far,
+    # choices[c][S] is the point picked in curve c and the seeds left for the previous curves
+    reach = [0]
+    choices = []
+    for curve in curves:
+        points = [(len(seeds), len(activation)) for seeds, activation in curve]
+        best = [-1] * (len(reach) + points[-1][0])
+        choice = [None] * len(best)
+        for S, reached in enumerate(reach):
+            for j, (seeds, gained) in enumerate(points):
+                if reached + gained > best[S+seeds]:
+                    best[S+seeds] = reached + gained
+                    choice[S+seeds] = (j, S)
+        for S in range(1, len(best)):
+            if best[S] < best[S-1]:
+                best[S] = best[S-1]
+                choice[S] = choice[S-1]
+        reach = best
+        choices.append(choice)
+
+    # more than the seeds of the curves are only needed for constraint 6, they then seed reached people
+    seeds = next((S for S in range(max(m, 0), len(reach)) if reach[S] >= M), None)
+    if seeds is None:
+        if m < len(reach) or reach[-1] < M:
+            return None
+        seeds = m
+    picks = []
+    S = min(seeds, len(reach) - 1)
+    for choice in reversed(choices):
+        j, S = choice[S]
+        picks.append(j)
+    return picks[::-1], seeds
+
+def solve(edges, n, m, M, backend='gurobi', horizon='safe', lazy=False, workers=None, compact=False):
+    ''' Solves the problem component by component
+    horizon : number of periods of the model of every component, see horizon.estimate_horizon
+    workers : number of processes solving the components (default: one per core)
+    compact : use the model without the y variables, see formulation.build_formulation
+    returns a formulation.Solution
+    '''
+    start = time()
+    parts = components(edges, n)
+    curves = [closed_curve(edges, people, m) for people in parts]
+    jobs = [c for c in range(len(parts)) if curves[c] is None]
+    print('Found '+str(len(parts))+' components, '+str(len(jobs))+' of them are solved with '+backend)
+    arguments = [subgraph(edges, parts[c]) + (m, backend, horizon, lazy, compact) for c in jobs]
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(jobs) <= 1:
+        results = [solve_curve(job) for job in arguments]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(solve_curve, arguments, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    stats = {'components': len(parts), 'solves': 0, 'nodes': 0, 'iterations': 0}
+    optimal = True
+    for c, (curve, solved, solve_stats) in zip(jobs, results):
+        curves[c] = curve
+        optimal = optimal and solved
+        for field in ('solves', 'nodes', 'iterations'):
+            stats[field] += solve_stats[field]
+    chosen = combine(curves, m, M)
+    stats['time'] = time() - start
+    if chosen is None:
+        return Solution('infeasible', stats=stats)
+
+    picks, count = chosen
+    activation = [None] * n
+    for curve, j in zip(curves, picks):
+        for i, period in curve[j][1].items():
+            activation[i] = period
+    # constraint 6 may need more seeds than the curves, reached people are seeded first
+    seeds = [i for i in range(n) if activation[i] == 0]
+    others = [i for i in range(n) if activation[i]] + [i for i in range(n) if activation[i] is None]
+    for i in others[:count - len(seeds)]:
+        activation[i] = 0
+    seeds = [i for i in range(n) if activation[i] == 0]
+    if len(seeds) < count:
+        return Solution('infeasible', stats=stats)
+    infected = n - activation.count(None)
+    objective = float((1+n-M) * len(seeds) + n - infected)
+    return Solution('optimal' if optimal else 'feasible', objective, seeds, infected, stats, activation=activation)
@@ -0,0 +1,363 @@
+''' Solver independent description of the IP model.
+
+The model is written once with numbered columns and rows, each backend turns
+it into a model of its own solver (see BACKENDS in ip_solver.py).
+'''
+from greedy import GREEDY_STRATEGIES
+from horizon import uses_last_period
+from presolve import presolve
+from telemetry import phase, size
+
+class Formulation:
+    ''' Columns, rows and MIP start of the IP model.
+
+    lb, ub, types, obj : one entry per column, types are 'B', 'I' or 'C'
+    names    : name of every column, None unless the formulation is named (the
+               backends then name the rows too), the solvers only need the indices
+    families : list of (name, rows, senses, rhs), one per constraint family,
+               a row is a pair (column indices, values) and senses are 'L', 'G' or 'E'
+    lazy     : families left out of the model, the backends only add the rows
+               that a solution found by the solver violates, see violated
+    start    : MIP start as {column: value}
+    x, y     : x[k][t] and y[k][t] columns of the k-th person kept by the presolve, no y when compact
+    z        : z[g] column of the seed-only group g
+    d        : column of the deviation from the absolute target
+    '''
+    def __init__(self, n, M, m, T, reduced, named=False):
+        self.n = n
+        self.M = M
+        self.m = m
+        self.T = T
+        self.reduced = reduced
+        self.names = [] if named else None
+        self.lb = []
+        self.ub = []
+        self.types = []
+        self.obj = []
+        self.families = []
+        self.lazy = []
+        self.start = {}
+        self.x = []
+        self.y = []
+        self.z = []
+        self.d = None
+
+    def columns(self):
+        ''' Number of columns '''
+        return len(self.obj)
+
+    def add_columns(self, count, lb, ub, vtype, obj=0, name=None):
+        ''' Adds count columns with the same bounds and type, returns their indices
+        obj  : cost of the columns, or a list with the cost of each one
+        name : name(k) is the name of the k-th column, only called for a named formulation
+        '''
+        start = len(self.obj)
+        self.lb += [lb] * count
+        self.ub += [ub] * count
+        self.types += [vtype] * count
+        self.obj += obj if isinstance(obj, list) else [obj] * count
+        if self.names is not None:
+            self.names += [name(k) for k in range(count)]
+        return list(range(start, start + count))
+
+    def add_column(self, name, lb, ub, vtype, obj=0):
+        ''' Adds a column and returns its index '''
+        return self.add_columns(1, lb, ub, vtype, obj, lambda k: name)[0]
+
+    def add_family(self, name, rows, senses, rhs, lazy=False):
+        (self.lazy if lazy else self.families).append((name, rows, senses, rhs))
+
+    def violated(self, values, tolerance=1e-6):
+        ''' Lazy rows violated by the column values, as a list of (name, indices, values, sense, rhs) '''
+        violated = []
+        for name, rows, senses, rhs in self.lazy:
+            for (indices, coefficients), sense, b in zip(rows, senses, rhs):
+                activity = sum(c * values[j] for j, c in zip(indices, coefficients))
+                if (sense != 'G' and activity > b + tolerance) or (sense != 'L' and activity < b - tolerance):
+                    violated.append((name, indices, coefficients, sense, b))
+        return violated
+
+    def solution(self, status, objective=None, values=None, stats=None):
+        ''' Turns the column values found by a backend into a Solution
+        values : value of every column, in one list
+        '''
+        if values is None:
+            return Solution(status, objective, stats=stats)
+        solution = self.reduced.lift([values[x_k[0]] for x_k in self.x], [values[z_g] for z_g in self.z])
+        # seeds of the groups are infected on the first period, the others never
+        activation = [0 if seeded else None for seeded in solution]
+        for i, x_i in zip(self.reduced.people, self.x):
+            activation[i] = _first_period(values, x_i)
+        infected = self.n - activation.count(None)
+        return Solution(status, objective, [i for i in range(self.n) if solution[i]], infected, stats,
+                        uses_last_period(activation, self.T), values, activation)
+
+    def row(self, name, i=0):
+        ''' Index of the i-th row of a family among the rows of all the families '''
+        offset = 0
+        for family, rows, senses, rhs in self.families:
+            if family == name:
+                return offset + i
+            offset += len(rows)
+        raise KeyError(name)
+
+    def retarget(self, M):
+        ''' Changes the required number of people to M
+        returns the columns whose cost changed, the backends also update the bound of d
+        and the right hand side of RequiredNumberOfPeople
+        '''
+        self.M = M
+        w1 = 1+self.n-M
+        seeds = [x_k[0] for x_k in self.x] + self.z
+        for j in seeds:
+            self.obj[j] = w1
+        self.ub[self.d] = self.n-M
+        for name, rows, senses, rhs in self.families:
+            if name == 'RequiredNumberOfPeople':
+                rhs[0] = M
+        return seeds
+
+def _first_period(values, x_i):
+    ''' First period on which the x columns of a person are 1, None if they never are
+    x never goes back to 0 (constraint 3) so the periods are bisected
+    '''
+    if values[x_i[-1]] < 0.5:
+        return None
+    low, high = 0, len(x_i) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if values[x_i[middle]] > 0.5:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+class Solution:
+    ''' Result of a solve, the same for every backend.
+
+    status        : 'optimal', 'feasible' (stopped early with a solution), 'infeasible' or 'no solution'
+    objective     : objective value, None without a solution
+    seeds         : original ids of the seeds, None without a solution
+    infected      : number of people infected on the last period
+    stats         : solver statistics such as 'time', 'nodes' and 'iterations'
+    horizon_tight : someone got infected on the last period, see horizon.expand_horizon
+    values        : value of every column, used to warm start the next solve
+    activation    : activation[i] is the period person i got infected (0 for the seeds, None if not infected)
+                    the model may infect someone later than the cascade of its seeds would
+    '''
+    def __init__(self, status, objective=None, seeds=None, infected=None, stats=None, horizon_tight=False, values=None,
+                 activation=None):
+        self.status = status
+        self.objective = objective
+        self.seeds = seeds
+        self.infected = infected
+        self.stats = stats if stats else {}
+        self.horizon_tight = horizon_tight
+        self.values = values
+        self.activation = activation
+
+    def reached(self):
+        ''' People infected at the end, None without a solution '''
+        if self.activation is None:
+            return None
+        return [i for i, period in enumerate(self.activation) if period is not None]
+
+    def to_dict(self):
+        return {'status': self.status, 'objective': self.objective, 'seeds': self.seeds,
+                'infected': self.infected, 'stats': self.stats, 'activation': self.activation}
+
+    @staticmethod
+    def from_dict(result):
+        ''' The Solution of a dict written by to_dict '''
+        return Solution(result['status'], result['objective'], result['seeds'], result['infected'], result['stats'],
+                        activation=result.get('activation'))
+
+def build_formulation(edges, n, M, m, T=None, reduce=True, greedy=None, lazy=False, telemetry=None, named=False, minimum_seeds=None, compact=False, start=None, bound=None):
+    ''' Describes the IP model.
+
+    edges     : a dict of id representing the edges {i:j}
+    n         : number of nodes in graph
+    M         : required number of people we need at the end
+    m         : number of friends needed to influence someone to install the app
+    T         : last period of the model (default: n), see horizon.estimate_horizon
+    reduce    : run the graph presolve first, see presolve.presolve
+    greedy    : greedy strategy used for the MIP start ('degree', 'celf' or 'search', True means 'degree')
+    lazy      : leave the Link2 rows out of the model, they are only added once a solution violates them
+    telemetry : telemetry.Telemetry recording the phases of the build
+    named     : name the columns and rows, to read the models written to a file
+    minimum_seeds : lower bound on the number of seeds (default: m, constraint 6)
+    compact   : leave the y columns out, one Threshold row per person and period replaces
+                the PeerPressure, Link1 and Link2 rows (lazy has no effect then)
+    start     : seeds (original ids) of a previous solution used as the MIP start instead of the greedy one
+    bound     : known lower bound on the objective, added as the ObjectiveBound row (see checkpoint.py)
+    '''
+    T = n if T is None else T
+    minimum_seeds = m if minimum_seeds is None else minimum_seeds
+
+    # calculate the number of friends for each person
+    # and calculate if each person has less than m friends
+    f = [len(edges.get(i, ())) for i in range(n)]
+    ltm = [f[i] < m for i in range(n)]
+
+    # people with less than m friends are seeds or never infected (constraint 7)
+    # so the presolve puts them in seed-only groups
+    with phase(telemetry, 'formulation/presolve'):
+        reduced = presolve(edges, n, m, reduce=reduce)
+    people = reduced.people
+    model = Formulation(n, M, m, T, reduced, named)
+
+    # objective function
+    # min weight1 * sum x[i][0] for i from 0 to n-1 + weight2 * d
+    # let weight2 = 1 and weight1 = 1 + n - M
+    # note: d has range from 0 to n-M
+    w1 = 1+n-M
+    w2 = 1
+
+    with phase(telemetry, 'formulation/variables') as fields:
+        # create the variables
+        # x[i,j] is 1 if app installed at step j else 0
+        # y[i,j] is 1 if i has at least m friends who have the app installed at step j-1 else 0
+        # for the people kept by the presolve, named after their original id
+        for i in people:
+            model.x.append(model.add_columns(T+1, 0, 1, 'B', [w1]+[0]*T, lambda t: 'x['+str(i)+','+str(t)+']'))
+        if not compact:
+            for i in people:
+                model.y.append(model.add_columns(T+1, 0, 1, 'B', 0, lambda t: 'y['+str(i)+','+str(t)+']'))
+        x, y = model.x, model.y
+
+        # z[g] is the number of seeds taken from the seed-only group g
+        for g in range(len(reduced.groups)):
+            model.z.append(model.add_column('z['+str(g)+']', 0, len(reduced.groups[g]), 'I', w1))
+        z = model.z
+
+        # d is the deviation from the absolute target
+        model.d = d = model.add_column('d', 0, n-M, 'C', w2)
+
+        # choice[k] is a disjunction variable of person k with less than m friends, only needed without the presolve
+        seed_only = [k for k in range(len(people)) if ltm[people[k]]]
+        choice = {k: model.add_column('choice['+str(people[k])+']', 0, 1, 'B') for k in seed_only}
+        size(fields, columns=model.columns())
+
+    # seeds and people infected at the end, the seed-only groups never change
+    seeds = [x_k[0] for x_k in x] + z
+    infected = [x_k[T] for x_k in x] + z
+
+    # Constraint 1
+    # at least M people at the end
+    # sum of x[i][T] for i from 0 to n-1 >= M
+    with phase(telemetry, 'formulation/RequiredNumberOfPeople') as fields:
+        rows = [(infected, [1]*len(infected))]
+        model.add_family('RequiredNumberOfPeople', rows, ['G'], [M])
+        size(fields, rows)
+
+    # Constraint 2
+    # as many people as possible at the end
+    # d + sum of x[i][T] for i from 0 to n-1 = n
+    with phase(telemetry, 'formulation/InfectAsManyPeopleAsPossible') as fields:
+        rows = [([d]+infected, [1]*(len(infected)+1))]
+        model.add_family('InfectAsManyPeopleAsPossible', rows, ['E'], [n])
+        size(fields, rows)
+
+    # Constraint 3
+    # if person i has the app installed at period t then he has it installed for the period t+1
+    # x[i][t-1] <= x[i][t] for all i = 0,...,n-1 and t = 1,...,T
+    with phase(telemetry, 'formulation/AppWillHauntYouForever') as fields:
+        rows = [([x_k[t-1], x_k[t]], [1,-1]) for x_k in x for t in range(1,T+1)]
+        model.add_family('AppWillHauntYouForever', rows, ['L']*len(rows), [0]*len(rows))
+        size(fields, rows)
+
+    if compact:
+        # Constraints 4 and 5 without y
+        # person i can only install the app at time t if at least m of their friends had it at time t-1
+        # m * (x[i][t] - x[i][t-1]) <= sum of x[k][t-1] for k friend of i for all i=0,...,n-1 and t=1,...,T
+        # nobody has to install it, a solution leaving someone out is never better than infecting them
+        with phase(telemetry, 'formulation/Threshold') as fields:
+            rows = []
+            for k in range(len(people)):
+                friend_groups = [z[g] for g in reduced.friend_groups[k]]
+                ones = [-1]*(len(reduced.edges[k]) + len(friend_groups))
+                for t in range(1,T+1):
+                    rows.append(([x[k][t], x[k][t-1]] + [x[j][t-1] for j in reduced.edges[k]] + friend_groups, [m,-m] + ones))
+            model.add_family('Threshold', rows, ['L']*len(rows), [0]*len(rows))
+            size(fields, rows)
+    else:
+        # Constraint 4
+        # if person i has at least m friends who have the app installed at time t-1 or earlier then person i will install app at time t
+        # x[i][t] <= x[i][t-1] + y[i][t] for all i = 0,...,n-1 and t = 1,...,T
+        with phase(telemetry, 'formulation/PeerPressure') as fields:
+            rows = [([x[k][t], x[k][t-1], y[k][t]], [1,-1,-1]) for k in range(len(people)) for t in range(1,T+1)]
+            model.add_family('PeerPressure', rows, ['L']*len(rows), [0]*len(rows))
+            size(fields, rows)
+
+        # Constraint 5
+        # link x[i][j] and y[i][j]
+        # only the friends k of i appear in the sums below, seed-only friends through their group
+        # part A
+        # sum of x[k][j-1] for k friend of i >= m * y[i][j] for all i=0,...,n-1 and j=1,...,T
+        # part B
+        # sum of x[k][j-1] for k friend of i <= m-1 + (n-m+1)*y[i][j] for all i=0,...,n-1 and j=1,...,T
+        with phase(telemetry, 'formulation/Link1 Link2') as fields:
+            link1 = []
+            link2 = []
+            for k in range(len(people)):
+                friend_groups = [z[g] for g in reduced.friend_groups[k]]
+                ones = [1]*(len(reduced.edges[k]) + len(friend_groups))
+                for t in range(1,T+1):
+                    friends = [x[j][t-1] for j in reduced.edges[k]] + friend_groups
+                    link1.append(([y[k][t]] + friends, [-m] + ones))
+                    link2.append(([y[k][t]] + friends, [-(n-m+1)] + ones))
+            model.add_family('Link1', link1, ['G']*len(link1), [0]*len(link1))
+            # part B only matters when a solution leaves someone with m infected friends out, so it can be lazy
+            model.add_family('Link2', link2, ['L']*len(link2), [m-1]*len(link2), lazy)
+            size(fields, link1 + link2)
+
+    # Constraint 6
+    # we require a minimum of m people to seed the process
+    # sum of x[i][0] >= m
+    with phase(telemetry, 'formulation/MinimumSeed') as fields:
+        rows = [(seeds, [1]*len(seeds))]
+        model.add_family('MinimumSeed', rows, ['G'], [minimum_seeds])
+        size(fields, rows)
+
+    # Constraint 7
+    # people who have less than m friends cannot be infected, so they either are infected on the first step or never at all
+    # sum of x[i][t] for t from 0 to T == (T+1 or 0) for all i with less than m friends
+    # (only left when the presolve is off)
+    with phase(telemetry, 'formulation/NeverInfected') as fields:
+        rows = [(x[k] + [choice[k]], [1]*(T+1) + [-(T+1)]) for k in seed_only]
+        model.add_family('NeverInfected', rows, ['E']*len(rows), [0]*len(rows))
+        size(fields, rows)
+
+    # a lower bound found by an earlier solve of the same model
+    # w1 * sum x[i][0] + w1 * sum z[g] + d >= bound
+    if bound is not None:
+        with phase(telemetry, 'formulation/ObjectiveBound') as fields:
+            rows = [(seeds + [d], [w1]*len(seeds) + [w2])]
+            # the bound of the solver has its tolerance
+            model.add_family('ObjectiveBound', rows, ['G'], [bound - 1e-6])
+            size(fields, rows)
+
+    # MIP Start
+    # seeds of a previous solution or greedy algorithm
+    if start is not None or greedy:
+        with phase(telemetry, 'formulation/start') as fields:
+            if start is not None:
+                solution = [0] * n
+                for i in start:
+                    solution[i] = 1
+            else:
+                strategy = 'degree' if greedy is True else greedy
+                solution = GREEDY_STRATEGIES[strategy](edges, f, m, M)
+            kept = 0
+            for k in range(len(people)):
+                model.start[x[k][0]] = 1.0 if solution[people[k]] else 0.0
+                kept += solution[people[k]]
+            for g, count in enumerate(reduced.group_seeds(solution)):
+                model.start[z[g]] = count
+                kept += count
+            # every person is in the cascade or in a seed-only group, a seed left out is a presolve bug
+            if kept < sum(solution):
+                print('Warning: '+str(sum(solution) - kept)+' seeds of the MIP start are not in the model and were dropped')
+            size(fields, columns=len(model.start))
+
+    return model
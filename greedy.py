@@ -0,0 +1,112 @@
+''' Greedy seed sets, used as MIP starts and as stand-alone answers. '''
+from heapq import heapify, heappop, heappush
+from cascade import Cascade, simulate
+
+def try_solution(edges,solution,m):
+    ''' Try a solution and outputs number of people infected on the last step
+    edges       : friendship graph
+    solution    : set of initially infected people
+    m           : minimum number of people needed to infected new person
+    returns number of people infected on the last step
+    '''
+    seeds = [i for i in range(len(solution)) if solution[i]]
+    infected, activation = simulate(edges, seeds, m, len(edges))
+    return infected
+
+def try_solutions(edges, solutions, m):
+    ''' try_solution for many solutions, all at once with batch_cascade.py when numpy and scipy are installed
+    solutions   : list of 0/1 lists
+    returns the number of people infected on the last step by each solution
+    '''
+    try:
+        import batch_cascade
+    except ImportError:
+        return [try_solution(edges, solution, m) for solution in solutions]
+    seeds = batch_cascade.seed_matrix([[i for i in range(len(solution)) if solution[i]] for solution in solutions], len(edges))
+    coverage, activation = batch_cascade.simulate(edges, seeds, m, len(edges))
+    return coverage.tolist()
+
+def find_greedy_solution(edges, f, m, M):
+    popularity = list( map( lambda pair:pair[0], sorted(enumerate(f), key=lambda person: person[1]) ))
+    n = len(edges)
+    solution = [0] * n
+    cascade = Cascade(edges, m, n)
+    while( cascade.infected < M ):
+        most_popular = popularity.pop()
+        solution[ most_popular ] = 1
+        cascade.add([most_popular])
+    return solution
+
+def find_celf_solution(edges, f, m, M):
+    ''' Greedy seeding by largest marginal gain, with lazy re-evaluation (CELF)
+    edges       : friendship graph
+    f           : number of friends of each person, used to break ties
+    m           : minimum number of people needed to infected new person
+    M           : required number of people we need at the end
+    returns the seeds as a 0/1 list
+
+    The threshold cascade is not submodular, a gain can grow as seeds are added,
+    so the gains in the heap are not bounds as in CELF. They are kept exact
+    instead: the gain of a person only changes when someone next to the people
+    it infects or to their friends gets infected (see Cascade.gain), so after
+    every seed only the people watching its newly infected people and their
+    friends are re-evaluated. The seeds are the ones of the greedy evaluating
+    every person on every round.
+    '''
+    n = len(edges)
+    solution = [0] * n
+    cascade = Cascade(edges, m, n)
+    gains = [1] * n
+    footprints = [None] * n
+    # watchers[i] are the people whose gain may change when someone next to i gets infected
+    watchers = [set() for i in range(n)]
+
+    def watch(person, footprint):
+        footprints[person] = footprint
+        for i in footprint:
+            watchers[i].add(person)
+
+    if m == 1:
+        # a seed infects its connected component, the only people whose gain it changes
+        for person in range(n):
+            if cascade.activation[person] is None and footprints[person] is None:
+                component = set()
+                gain = cascade.gain([person], component)
+                for i in component:
+                    gains[i] = gain
+                    watch(i, {i})
+    else:
+        # with m >= 2 a single seed on an empty graph only infects itself
+        for person in range(n):
+            watch(person, {person} | set(edges.get(person, ())))
+    heap = [(-gains[i], -f[i], i) for i in range(n)]
+    heapify(heap)
+    while( cascade.infected < M ):
+        gain, friends, person = heappop(heap)
+        if cascade.activation[person] is not None or -gain != gains[person]:
+            continue
+        solution[ person ] = 1
+        cascade.add([person])
+        touched = set()
+        for i in footprints[person]:
+            if cascade.activation[i] is not None:
+                touched.add(i)
+                touched.update(edges.get(i, ()))
+        stale = set()
+        for i in touched:
+            stale |= watchers[i]
+            watchers[i] = set()
+        for i in stale:
+            if cascade.activation[i] is None:
+                footprint = set()
+                gains[i] = cascade.gain([i], footprint)
+                watch(i, footprint)
+                heappush(heap, (-gains[i], -f[i], i))
+    return solution
+
+def find_search_solution(edges, f, m, M):
+    ''' CELF seeds improved by simulated annealing, see local_search.improve '''
+    from local_search import improve
+    return improve(edges, m, M, find_celf_solution(edges, f, m, M))
+
+GREEDY_STRATEGIES = {'degree': find_greedy_solution, 'celf': find_celf_solution, 'search': find_search_solution}
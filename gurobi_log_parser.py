@@ -8,32 +8,83 @@ def parse(filename):
                 continue
             else:
                 break
-        for line in file:
-            if line.strip == '':
-                continue
-            else:
-                break
+        # the node lines come after the blank lines following the header, up to the next blank line
         lastline = ''
         steps = 0
         for line in file:
             if line.strip() == '':
-                break
+                if steps:
+                    break
             else:
                 steps += 1
                 lastline = line
         data = lastline.split()
         if not data:
             return None
+        # heuristic solution lines start with H or *
+        if not data[0].isdigit():
+            data = data[1:]
         try:
             explored_nodes = int(data[0])
-        except:
-            try:
-                data = data[1:]
-                explored_nodes = int(data[0])
-            except:
-                print(data)
-        time = int(data[-1][:-1])
+            time = int(data[-1][:-1])
+        except (IndexError, ValueError):
+            print('Cannot parse the last node line: '+lastline.strip())
+            return None
         return {'steps': steps, 'explored nodes': explored_nodes, 'time' : time}
+
+def _number(text):
+    ''' Float of a number of the log, None for - '''
+    text = text.rstrip('%,')
+    return None if text == '-' else float(text)
+
+def summary(filename):
+    ''' Reads the result of the last solve of a log without printing anything
+    returns a dict with the 'status' (optimal, infeasible, time limit or unknown), 'objective', 'bound',
+    'gap' (in %), 'steps' and 'nodes' like parse, the 'explored' nodes, simplex 'iterations' and 'time'
+    in seconds of the end of the solve, and the 'rows', 'columns' and 'nonzeros' of the model, None for
+    what the log does not have
+
+    The node lines are printed every few seconds, so the nodes of the last one (as parse and the
+    stats files of the runners count them) are often fewer than the explored nodes.
+    '''
+    result = {}
+    steps = None
+    with open(filename) as file:
+        for line in file:
+            data = line.split()
+            if line.startswith('Optimize a model with'):
+                # a new solve starts
+                result = {'rows': int(data[4]), 'columns': int(data[6]), 'nonzeros': int(data[9])}
+                steps = None
+            elif line.startswith(' Expl Unexpl'):
+                steps = 0
+            elif steps is not None and 'steps' not in result:
+                if line.strip():
+                    steps += 1
+                    # heuristic solution lines start with H or *
+                    nodes = data[0] if data[0].isdigit() else data[1]
+                    result['nodes'] = int(nodes) if nodes.isdigit() else None
+                elif steps:
+                    result['steps'] = steps
+            if line.startswith('Explored '):
+                result['explored'] = int(data[1])
+                result['iterations'] = int(data[3][1:])
+                result['time'] = float(data[-2])
+            elif line.startswith('Optimal solution found'):
+                result['status'] = 'optimal'
+            elif line.startswith('Model is infeasible'):
+                result['status'] = 'infeasible'
+            elif line.startswith('Time limit reached'):
+                result['status'] = 'time limit'
+            elif line.startswith('Best objective'):
+                result['objective'], result['bound'], result['gap'] = _number(data[2]), _number(data[5]), _number(data[7])
+    if steps and 'steps' not in result:
+        result['steps'] = steps
+    for field in ('status', 'objective', 'bound', 'gap', 'nodes', 'explored', 'iterations', 'time', 'steps', 'rows', 'columns', 'nonzeros'):
+        result.setdefault(field, None)
+    if result['status'] is None:
+        result['status'] = 'unknown'
+    return result
         
 if __name__=='__main__':
     parser = argparse.ArgumentParser(description='Parses a gurobi log file')
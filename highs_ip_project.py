@@ -0,0 +1,174 @@
+import highspy
+import ip_solver
+from formulation import build_formulation
+from telemetry import phase, size
+
+def to_model(formulation, telemetry=None):
+    ''' Builds the HiGHS model of a formulation.Formulation
+
+    telemetry : telemetry.Telemetry recording the phases of the construction
+    '''
+    model = highspy.Highs()
+
+    # create variables
+    with phase(telemetry, 'model/variables') as fields:
+        columns = formulation.columns()
+        model.addVars(columns, formulation.lb, formulation.ub)
+        model.changeColsCost(columns, list(range(columns)), formulation.obj)
+        integers = [j for j in range(columns) if formulation.types[j] != 'C']
+        model.changeColsIntegrality(len(integers), integers, [highspy.HighsVarType.kInteger]*len(integers))
+        size(fields, columns=columns)
+
+    # add constraints, one call per family
+    # highs has no lazy constraint callback, the lazy rows are in the model from the start
+    if formulation.lazy:
+        print('HiGHS cannot add lazy rows during the solve, adding the '+', '.join(family[0] for family in formulation.lazy)+' rows to the model')
+    for name, rows, senses, rhs in formulation.families + formulation.lazy:
+        with phase(telemetry, 'model/'+name) as fields:
+            add_rows(model, [(indices, values, sense, b) for (indices, values), sense, b in zip(rows, senses, rhs)])
+            size(fields, rows)
+
+    # Objective function
+    model.changeObjectiveSense(highspy.ObjSense.kMinimize)
+
+    # MIP start
+    if formulation.start:
+        with phase(telemetry, 'model/start'):
+            start = list(formulation.start)
+            model.setSolution(len(start), start, [formulation.start[j] for j in start])
+
+    print('finished modeling')
+    return model
+
+def add_rows(model, rows):
+    ''' Adds rows given as (indices, values, sense, rhs) '''
+    inf = highspy.kHighsInf
+    lower, upper, starts, indices, values = [], [], [], [], []
+    for row_indices, row_values, sense, b in rows:
+        lower.append(-inf if sense == 'L' else b)
+        upper.append(inf if sense == 'G' else b)
+        starts.append(len(indices))
+        indices += row_indices
+        values += row_values
+    if rows:
+        model.addRows(len(rows), lower, upper, len(indices), starts, indices, values)
+
+def build_model(edges,n,M,m,T=None,reduce=True,lazy=False,compact=False):
+    ''' Builds the IP model use HiGHS.
+
+    edge: a dict of id representing the edges {i:j}
+    n : number of nodes in graph
+    M : required number of people we need at the end
+    m : number of friends needed to influence someone to install the app
+    T : last period of the model (default: n), see horizon.estimate_horizon
+    reduce : run the graph presolve first, see presolve.presolve
+    lazy : has no effect, highs has no lazy constraint callback (see to_model)
+    compact : model without the y variables, see formulation.build_formulation
+    returns (model, formulation)
+    '''
+    formulation = build_formulation(edges, n, M, m, T, reduce, lazy=lazy, compact=compact)
+    return to_model(formulation), formulation
+
+# threads of the global scheduler of HiGHS, which is shared by the models of the process
+_threads = None
+
+def setup(model, log_file=None, memory=False, threads=4):
+    ''' Sets the options of the model '''
+    global _threads
+    # the scheduler keeps the threads of the first solve, a long running process changing them restarts it
+    if _threads is not None and _threads != threads:
+        highspy.Highs.resetGlobalScheduler(True)
+    _threads = threads
+    model.setOptionValue('threads', threads)
+    if log_file:
+        model.setOptionValue('log_file', log_file)
+
+def _progress(event):
+    ''' Records the progress of the solver in the telemetry passed as user data with the formulation '''
+    out = event.data_out
+    telemetry, formulation = event.user_data
+    incumbent = out.mip_primal_bound if abs(out.mip_primal_bound) < highspy.kHighsInf else None
+    bound = out.mip_dual_bound if abs(out.mip_dual_bound) < highspy.kHighsInf else None
+    iterations = out.simplex_iteration_count if out.simplex_iteration_count >= 0 else None
+    telemetry.progress(incumbent, bound, out.mip_node_count, iterations)
+
+def _incumbent(event):
+    ''' Records a better solution with its seeds, then the progress '''
+    telemetry, formulation = event.user_data
+    objective = event.data_out.objective_function_value
+    if telemetry.improves(objective):
+        values = list(event.data_out.mip_solution)
+        telemetry.incumbent(objective, formulation.solution('feasible', objective, values).seeds)
+    _progress(event)
+
+def optimize(model, formulation, solution_file=None, model_file=None, telemetry=None):
+    ''' Solves the model of the formulation, returns a formulation.Solution
+    telemetry : telemetry.Telemetry recording the progress of the solver
+    '''
+    model.clearCallbacks()
+    if telemetry:
+        model.cbMipLogging.subscribe(_progress, (telemetry, formulation))
+        model.cbMipImprovingSolution.subscribe(_incumbent, (telemetry, formulation))
+
+    # solve the model
+    # the run time of highs adds up over the runs of a model, see sweep.py
+    before = model.getRunTime()
+    model.run()
+
+    # save model to storage
+    if model_file:
+        model.writeModel(model_file)
+
+    info = model.getInfo()
+    model_status = model.getModelStatus()
+    print('Solution status = '+model.modelStatusToString(model_status))
+    stats = {'time': model.getRunTime() - before, 'nodes': info.mip_node_count, 'iterations': info.simplex_iteration_count}
+    feasible = info.primal_solution_status == 2
+    if telemetry:
+        # the last incumbent may not have reached the callback
+        if feasible and telemetry.improves(info.objective_function_value):
+            values = list(model.getSolution().col_value)
+            telemetry.incumbent(info.objective_function_value, formulation.solution('feasible', values=values).seeds)
+        telemetry.progress(info.objective_function_value if feasible else None, info.mip_dual_bound if feasible else None,
+                           stats['nodes'], stats['iterations'], force=True)
+    if model_status == highspy.HighsModelStatus.kOptimal:
+        status = 'optimal'
+    elif model_status == highspy.HighsModelStatus.kInfeasible:
+        status = 'infeasible'
+    else:
+        status = 'feasible' if feasible else 'no solution'
+    if not feasible:
+        return formulation.solution(status, stats=stats)
+
+    if solution_file:
+        model.writeSolution(solution_file, 0)
+        print('Solution has been written to '+solution_file)
+    return formulation.solution(status, info.objective_function_value, list(model.getSolution().col_value), stats)
+
+def retarget(model, formulation, M):
+    ''' Changes the required number of people of the model in place, see formulation.Formulation.retarget '''
+    seeds = formulation.retarget(M)
+    model.changeColsCost(len(seeds), seeds, [formulation.obj[j] for j in seeds])
+    model.changeColBounds(formulation.d, formulation.lb[formulation.d], formulation.ub[formulation.d])
+    model.changeRowBounds(formulation.row('RequiredNumberOfPeople'), M, highspy.kHighsInf)
+
+def warm_start(model, values):
+    ''' Starts the next solve from the column values of a previous solution '''
+    model.setSolution(len(values), list(range(len(values))), values)
+
+def close(model):
+    ''' Frees the model '''
+    model.clear()
+
+def solve(formulation, solution_file=None, log_file=None, model_file=None, memory=False, threads=4, telemetry=None):
+    with phase(telemetry, 'model'):
+        model = to_model(formulation, telemetry)
+    setup(model, log_file, memory, threads)
+    try:
+        with phase(telemetry, 'optimize'):
+            return optimize(model, formulation, solution_file, model_file, telemetry)
+    finally:
+        close(model)
+
+if __name__=='__main__':
+    ip_solver.main('highs')
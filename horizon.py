@@ -0,0 +1,61 @@
+''' Number of periods the IP models are built with.
+
+The models used to have a period for every person, but a cascade stops as soon
+as a step infects nobody new, so it usually ends long before that.
+'''
+from cascade import simulate
+
+def safe_horizon(edges, n, m):
+    ''' Upper bound on the number of steps any cascade can last
+    edges : friendship graph
+    n     : number of nodes in graph
+    m     : number of friends needed to influence someone to install the app
+
+    Every step of a running cascade infects at least one new person, a cascade
+    needs at least m seeds to infect anyone and only people with at least m
+    friends can be infected after the first step.
+    '''
+    if m <= 0:
+        return 1
+    can_be_infected = 0
+    for i in range(n):
+        if len(edges.get(i, ())) >= m:
+            can_be_infected += 1
+    return max(1, min(n - m, can_be_infected))
+
+def cascade_horizon(edges, seeds, m, n):
+    ''' Number of steps the cascade started by the seeds lasts (at least 1) '''
+    infected, activation = simulate(edges, seeds, m, n)
+    return max([1] + [step for step in activation if step is not None])
+
+def estimate_horizon(edges, n, m, horizon='safe', seeds=None):
+    ''' Last period T of the model, periods are numbered 0,...,T
+    horizon : 'full' for one period per person, 'safe' for safe_horizon,
+              'greedy' for the length of the cascade started by seeds or a number of periods
+    seeds   : seeds of a known solution, used by 'greedy'
+
+    'greedy' and numbers are guesses, use expand_horizon if the solution needs the last period.
+    '''
+    if horizon == 'full':
+        return n
+    bound = safe_horizon(edges, n, m)
+    if horizon == 'safe':
+        return bound
+    if horizon == 'greedy':
+        return min(bound, cascade_horizon(edges, seeds, m, n))
+    return max(1, min(bound, int(horizon)))
+
+def expand_horizon(edges, n, m, T):
+    ''' Next horizon to try when a solution infected someone on the last period T or there was none
+    returns None if T is already safe, only a safe T proves the solution optimal
+    '''
+    bound = safe_horizon(edges, n, m)
+    if T >= bound:
+        return None
+    return min(2 * T, bound)
+
+def uses_last_period(activation, T):
+    ''' Whether anyone got infected on the last period T of a model
+    activation : activation[i] is the period person i got infected (None if not infected)
+    '''
+    return T > 0 and T in activation
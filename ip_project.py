@@ -1,197 +1,163 @@
-import argparse
 import cplex
-from cplex.exceptions import CplexError
-
-
-def load(file):
-    edges = {}
-    n = 0
-    with open(file) as f:
-        for line in f:
-            i,j = map( lambda item: int(item), line.split())
-            try:
-                edges[i] += [j]
-            except KeyError:
-                edges[i] = [j]
-            try:
-                edges[j] += [i]
-            except KeyError:
-                edges[j] = [i]
-            n += 1
-    return (edges,n)
-
-def build_model(edges,n,M,m):
-    ''' Builds the IP model use cplex.
-    
-    edge: a dict of id representing the edges {i:j}
-    n : number of nodes in graph
-    M : required number of people we need at the end
-    m : number of friends needed to influence someone to install the app
+from cplex.callbacks import LazyConstraintCallback, MIPInfoCallback
+import ip_solver
+from formulation import build_formulation
+from telemetry import phase, size
+
+def to_model(formulation, telemetry=None):
+    ''' Builds the cplex model of a formulation.Formulation
+
+    telemetry : telemetry.Telemetry recording the phases of the construction
     '''
     model = cplex.Cplex()
-    
+
     # create variables
-    
-    # x[i,j] is 1 if app installed at step j else 0
-    x = []
-    x_names = []
-    for i in range(n):
-        x.append([])
-        for j in range(n):
-            name = 'x['+str(i)+','+str(j)+']'
-            x_names.append(name)
-            x[i].append(name)
-    model.variables.add(names=x_names, lb=[0]*n**2, ub=[1]*n**2, types=['B']*n**2)
-    
-    # y[i,j] is 1 if i has at least m friends who have the app installed at step j-1 else 0
-    y = []
-    y_names = []
-    for i in range(n):
-        y.append([])
-        for j in range(n):
-            name = 'y['+str(i) +','+str(j)+']'
-            y_names.append(name)
-            y[i].append(name)
-    model.variables.add(names=y_names, lb=[0]*n**2, ub=[1]*n**2, types=['B']*n**2)
-
-    # d is the deviation from the absolute target
-    model.variables.add(names=['d'], lb=[0], ub=[n-M])
-    
-    # construct the parameter c 
-    # c[i,j] is 1 if i is friends with j else 0
-    c = [[0]*n for i in range(n)]
-    index = {}
-    counter = 0
-    for i,neighbours in edges.items():
-        for j in neighbours:
-            if i not in edges.keys():
-                index[i] = counter
-                counter += 1
-            if j not in edges.keys():
-                index[j] = counter
-                counter += 1
-    for i,neighbours in edges.items():
-        for j in neighbours:
-            try:
-                c[index[i]][index[j]] = 1
-            except: 
-                pass
-    
+    with phase(telemetry, 'model/variables') as fields:
+        model.variables.add(obj=formulation.obj, lb=formulation.lb, ub=formulation.ub, types=formulation.types, names=formulation.names)
+        size(fields, columns=formulation.columns())
+
     # add constraints
-    
-    # Constraint 1
-    # at least M people at the end
-    # sum of x[i][n] for i from 0 to n-1 >= M
-    
-    model.linear_constraints.add(lin_expr   = [cplex.SparsePair(ind=['x['+str(i)+','+str(n-1)+']' for i in range(n)],val=[1]*n)],
-                                 senses     = ['G'],
-                                 rhs        = [M],
-                                 names      = ['RequiredNumberOfPeople']
-                                )
-    
-    # Constraint 2
-    # as many people as possible at the end
-    # d + sum of x[i][n] for i from 0 to n-1 = n
-    
-    model.linear_constraints.add(lin_expr    = [cplex.SparsePair(ind=['d']+['x['+str(i)+','+str(n-1)+']' for i in range(n)], val=[1]*(n+1))],
-                                 senses      = ['E'], 
-                                 rhs         = [n],
-                                 names       = ['InfectAsManyPeopleAsPossible']
-                                )
-    
-    # Constraint 3
-    # if person i has the app installed at period t then he has it installed for the period t+1
-    # x[i][t-1] <= x[i][t] for all i = 0,...,n-1 and t = 1,...,n-1
-    
-    model.linear_constraints.add(lin_expr   = [cplex.SparsePair(ind=['x['+str(i)+','+str(t)+']', 'x['+str(i)+','+str(t-1)+']'], val=[-1,1]) for i in range(n) for t in range(1,n)],
-                                 senses     = ['L']*(n*(n-1)),
-                                 rhs        = [0]*(n*(n-1)),
-                                 names      = ['AppWillHauntYouForever_'+str(i) for i in range(n*(n-1)) ]
-                                )
-    # Constraint 4
-    # if person i has at least m friends who have the app installed at time t-1 or earlier then person i will install app at time t
-    # x[i][t] <= x[i][t-1] + y[i][t] 
-    
-    model.linear_constraints.add(lin_expr   = [cplex.SparsePair(ind=['x['+str(i)+','+str(t)+']', 'x['+str(i)+','+str(t-1)+']', 'y['+str(i)+','+str(t)+']'], val=[1,-1,-1]) for i in range(n) for t in range(1,n)],
-                                 senses     = ['L']*(n*(n-1)),
-                                 rhs        = [0]*(n*(n-1)),
-                                 names      = ['PeerPressure_'+str(i) for i in range(n*(n-1))]
-                                )
-    
-    # Constraint 5
-    # link x[i][j] and y[i][j]
-    # part A
-    # sum of c[i][k] * x[k][j-1] for k from 0 to n-1 >= m * y[i][j] for all i=0,...,n-1 and j=1,...,n-1
-    
-    model.linear_constraints.add(lin_expr    = [cplex.SparsePair(ind=['y['+str(i)+','+str(j)+']']+['x['+str(k)+','+str(j-1)+']' for k in range(n)], val=[-m]+[c[i][k] for k in range(n)]) for i in range(n) for j in range(1,n)],
-                                 senses      = ['G']*(n*(n-1)), 
-                                 rhs         = [0]*(n*(n-1)),
-                                 names       = ['Link1_'+str(i) for i in range(n*(n-1))]
-                                )
-    
-    # part B
-    # sum of c[i][k] * x[k][j-1] for k from 0 to n-1 <= m-1 + (n-m+1)*y[i][j] for all i=0,...,n-1 and j=1,...,n-1
-    
-    model.linear_constraints.add(lin_expr    = [cplex.SparsePair(ind=['y['+str(i)+','+str(j)+']']+['x['+str(k)+','+str(j-1)+']' for k in range(n)], val=[-(n-m+1)]+[c[i][k] for k in range(n)]) for i in range(n) for j in range(1,n)],
-                                 senses      = ['L']*(n*(n-1)), 
-                                 rhs         = [m-1]*(n*(n-1)),
-                                 names       = ['Link2_'+str(i) for i in range(n*(n-1))]
-                                )
-    
+    for name, rows, senses, rhs in formulation.families:
+        with phase(telemetry, 'model/'+name) as fields:
+            model.linear_constraints.add(lin_expr   = [cplex.SparsePair(ind=indices, val=values) for indices, values in rows],
+                                         senses     = senses,
+                                         rhs        = rhs,
+                                         names      = None if formulation.names is None else [name+'_'+str(i) for i in range(len(rows))]
+                                        )
+            size(fields, rows)
+
     # Objective function
-    # min weight1 * sum x[i][0] for i from 0 to n-1 + weight2 * d
-    # let weight2 = 1 and weight1 = 1 + n - M
-    # note: d has range from 0 to n-M 
     model.objective.set_sense(model.objective.sense.minimize)
-    w1 = 1+n-M
-    w2 = 1
-    model.objective.set_linear('d', w2)
-    for i in range(n):
-        model.objective.set_linear('x['+str(i)+',0]', w1)
+
+    # MIP start
+    if formulation.start:
+        with phase(telemetry, 'model/start'):
+            columns = list(formulation.start)
+            model.MIP_starts.add(cplex.SparsePair(ind=columns, val=[formulation.start[j] for j in columns]),
+                                 model.MIP_starts.effort_level.auto, 'greedy')
+
+    # lazy rows
+    if formulation.lazy:
+        callback = model.register_callback(LazyRows)
+        callback.formulation = formulation
 
     print('finished modeling')
     return model
 
-if __name__=='__main__':
-    parser = argparse.ArgumentParser(description='Solve a advertisement spreading over social network problem')
-    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
-    parser.add_argument('M', type=int, help='minimum number of people who we want to have installed the app')
-    parser.add_argument('friends_file', help='file defining the social network')
-    parser.add_argument('-o', '--output', help='name the output file (default: solution.txt)')
-    parser.add_argument('-m', '--model', help='save the model (after running solve) to a file')
-    args = parser.parse_args()
-    # extract user input
-    m, M, friends_file = args.m, args.M, args.friends_file
-    solution_file = args.output if args.output else 'solution.txt'
-    model_file = args.model if args.model else None
-    edges,n = load(friends_file)
-    
-    # build the model
-    model = build_model(edges,n,M,m)
-    
+class LazyRows(LazyConstraintCallback):
+    ''' Adds the lazy rows violated by every integer solution, see formulation.Formulation.violated '''
+    def __call__(self):
+        for name, indices, values, sense, b in self.formulation.violated(self.get_values()):
+            self.add(constraint=cplex.SparsePair(ind=indices, val=values), sense=sense, rhs=b)
+
+class Progress(MIPInfoCallback):
+    ''' Records the progress of the solver and the incumbents with their seeds in self.telemetry '''
+    def __call__(self):
+        incumbent = self.get_incumbent_objective_value() if self.has_incumbent() else None
+        if self.telemetry.improves(incumbent):
+            self.telemetry.incumbent(incumbent, self.formulation.solution('feasible', incumbent, self.get_incumbent_values()).seeds)
+        self.telemetry.progress(incumbent, self.get_best_objective_value(), self.get_num_nodes(), self.get_num_iterations())
+
+def build_model(edges,n,M,m,T=None,reduce=True,lazy=False,compact=False):
+    ''' Builds the IP model use cplex.
+
+    edge: a dict of id representing the edges {i:j}
+    n : number of nodes in graph
+    M : required number of people we need at the end
+    m : number of friends needed to influence someone to install the app
+    T : last period of the model (default: n), see horizon.estimate_horizon
+    reduce : run the graph presolve first, see presolve.presolve
+    lazy : add the Link2 rows in a lazy constraint callback
+    compact : model without the y variables, see formulation.build_formulation
+    returns (model, formulation)
+    '''
+    formulation = build_formulation(edges, n, M, m, T, reduce, lazy=lazy, compact=compact)
+    return to_model(formulation), formulation
+
+def setup(model, log_file=None, memory=False, threads=4):
+    ''' Sets the parameters of the model '''
+    if log_file:
+        # kept open over the solves of the model, see close
+        model._log = open(log_file, 'w')
+        model.set_results_stream(model._log)
+        model.set_log_stream(model._log)
+    model.parameters.threads.set(threads)
+    if memory:
+        # store the node files on disk once the tree uses 512Mb
+        model.parameters.workmem.set(512)
+        model.parameters.mip.strategy.file.set(3)
+
+def optimize(model, formulation, solution_file=None, model_file=None, telemetry=None):
+    ''' Solves the model of the formulation, returns a formulation.Solution
+    telemetry : telemetry.Telemetry recording the progress of the solver
+    '''
+    if telemetry:
+        callback = model.register_callback(Progress)
+        callback.telemetry = telemetry
+        callback.formulation = formulation
+
     # solve the model
+    start = model.get_time()
     model.solve()
-    
+    elapsed = model.get_time() - start
+
     # save model to storage
     if model_file:
         model.write(model_file)
-        
-    # print the solution
+
     sol = model.solution
     print("Solution status = ", sol.get_status(), ":", end=' ')
     print(sol.status[sol.get_status()])
-    if sol.is_primal_feasible():
-        print("Solution value  = ", sol.get_objective_value())
+    stats = {'time': elapsed, 'nodes': sol.progress.get_num_nodes_processed(), 'iterations': sol.progress.get_num_iterations()}
+    if telemetry:
+        feasible = sol.is_primal_feasible()
+        # the last incumbent may not have reached the callback
+        if feasible and telemetry.improves(sol.get_objective_value()):
+            telemetry.incumbent(sol.get_objective_value(), formulation.solution('feasible', values=sol.get_values()).seeds)
+        telemetry.progress(sol.get_objective_value() if feasible else None, sol.MIP.get_best_objective() if feasible else None,
+                           stats['nodes'], stats['iterations'], force=True)
+    if sol.get_status() in (sol.status.MIP_optimal, sol.status.optimal_tolerance):
+        status = 'optimal'
+    elif sol.get_status() in (sol.status.MIP_infeasible, sol.status.MIP_infeasible_or_unbounded):
+        status = 'infeasible'
+    else:
+        status = 'feasible' if sol.is_primal_feasible() else 'no solution'
+    if not sol.is_primal_feasible():
+        return formulation.solution(status, stats=stats)
+
+    if solution_file:
         sol.write(solution_file)
         print('Solution has been written to '+solution_file)
-        
-        # read solution file
-        import xml.etree.ElementTree as ET
-        tree = ET.parse(solution_file)
-        root = tree.getroot()
-        for variable in root.find('variables'):
-            if 'x' in variable.get('name') and ',0]' in variable.get('name'):
-                print(variable.get('name') +' : '+variable.get('value'))
-                
-    else:
-        print("No solution available.")
\ No newline at end of file
+    return formulation.solution(status, sol.get_objective_value(), sol.get_values(), stats)
+
+def retarget(model, formulation, M):
+    ''' Changes the required number of people of the model in place, see formulation.Formulation.retarget '''
+    model.objective.set_linear([(j, formulation.obj[j]) for j in formulation.retarget(M)])
+    model.variables.set_upper_bounds(formulation.d, formulation.ub[formulation.d])
+    model.linear_constraints.set_rhs(formulation.row('RequiredNumberOfPeople'), M)
+
+def warm_start(model, values):
+    ''' Starts the next solve from the column values of a previous solution '''
+    model.MIP_starts.delete()
+    model.MIP_starts.add(cplex.SparsePair(ind=list(range(len(values))), val=values),
+                         model.MIP_starts.effort_level.check_feasibility, 'previous')
+
+def close(model):
+    ''' Frees the model and closes its log file '''
+    log = getattr(model, '_log', None)
+    model.end()
+    if log:
+        log.close()
+
+def solve(formulation, solution_file=None, log_file=None, model_file=None, memory=False, threads=4, telemetry=None):
+    with phase(telemetry, 'model'):
+        model = to_model(formulation, telemetry)
+    setup(model, log_file, memory, threads)
+    try:
+        with phase(telemetry, 'optimize'):
+            return optimize(model, formulation, solution_file, model_file, telemetry)
+    finally:
+        close(model)
+
+if __name__=='__main__':
+    ip_solver.main('cplex')
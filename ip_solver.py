@@ -0,0 +1,226 @@
+''' Solves the advertisement spreading problem with one of the solver backends.
+
+Every backend module provides to_model(formulation, telemetry), the model of its solver,
+and solve(formulation, solution_file, log_file, model_file, memory, threads, telemetry), which
+returns a formulation.Solution. The backends are only imported when used so
+each one only needs its own solver installed.
+'''
+import argparse
+import cProfile
+import json
+import pstats
+from importlib import import_module
+import decomposition
+import result_cache
+from checkpoint import Checkpoint
+from formulation import build_formulation, Solution
+from greedy import GREEDY_STRATEGIES
+from horizon import estimate_horizon, expand_horizon
+from social_network import load
+from telemetry import Telemetry, phase, print_phases
+
+BACKENDS = {'gurobi': 'gurobi_ip_project', 'cplex': 'ip_project', 'highs': 'highs_ip_project'}
+# backends adding the lazy rows from a callback, highs puts them in the model
+LAZY_BACKENDS = ('gurobi', 'cplex')
+
+def get_backend(name):
+    return import_module(BACKENDS[name])
+
+def run(friends_file, m, M, solution_file=None, model_file=None, log_file=None, greedy=None, horizon='safe', expand=False, reduce=True, backend='gurobi', memory=False, result_file=None, threads=4, lazy=False, cache=result_cache.CACHE_DIR, telemetry_file=None, phases=False, activation_file=None, named=False, decompose=None, compact=False, listener=None, checkpoint_file=None):
+    ''' Loads the graph, solves the problem and prints the solution
+    cache          : folder of the result cache, None to always solve (see result_cache.py),
+                     the cached results are not read when the solution, model or log file is asked for
+    telemetry_file : json lines file recording the build phases and the progress of the solver (see telemetry.py)
+    phases         : print the time, memory and model size of every build phase (traces the memory, slower)
+    activation_file: write the period every reached person got infected on, see write_activation
+    named          : name the columns and rows of the model, see formulation.build_formulation
+    decompose      : solve the connected components apart with this many processes, see decomposition.py
+                     (0 for one per core, None to solve the whole graph at once)
+    compact        : use the model without the y variables, see formulation.build_formulation
+    listener       : function called with every telemetry record, see telemetry.Telemetry
+    checkpoint_file: keep the best seeds and bound in this file and resume from it, see checkpoint.py
+                     (not with decompose)
+    returns a formulation.Solution, with the phase records of the telemetry (see telemetry.py) in stats['phases']
+    when there is a telemetry
+    '''
+    telemetry = Telemetry(telemetry_file, memory=phases, listener=listener) if telemetry_file or phases or listener or checkpoint_file else None
+    solver = get_backend(backend)
+    with phase(telemetry, 'load'):
+        edges,n = load(friends_file)
+    if cache or checkpoint_file:
+        key = result_cache.cache_key(edges, n, m, M, horizon, backend, greedy=greedy, expand=expand, decompose=decompose is not None,
+                                       compact=compact, lazy=lazy, reduce=reduce)
+    # the solver writes the solution, model and log files, a cached result has none of them
+    if cache and not (solution_file or model_file or log_file):
+        cached = result_cache.get(key, cache)
+        if cached:
+            print('Found the result in the cache')
+            solution = Solution.from_dict(cached)
+            write_solution(solution, result_file, telemetry, True, phases, activation_file)
+            if telemetry:
+                solution.stats['phases'] = telemetry.phases()
+            return solution
+    if decompose is not None:
+        # the components get their own horizon
+        with phase(telemetry, 'decompose'):
+            solution = decomposition.solve(edges, n, m, M, backend, 'safe' if horizon == 'greedy' else horizon, lazy, decompose, compact)
+    else:
+        checkpoint = None
+        if checkpoint_file:
+            checkpoint = Checkpoint(checkpoint_file, key)
+            telemetry.listen(checkpoint.listen)
+        seeds = None
+        with phase(telemetry, 'horizon'):
+            if horizon == 'greedy':
+                f = [len(edges[i]) for i in range(n)]
+                solution = GREEDY_STRATEGIES[greedy if greedy in GREEDY_STRATEGIES else 'degree'](edges, f, m, M)
+                seeds = [i for i in range(n) if solution[i]]
+            T = estimate_horizon(edges, n, m, horizon, seeds)
+        while True:
+            print('Building model with T = '+str(T))
+            start, bound = checkpoint.resume(T) if checkpoint else (None, None)
+            with phase(telemetry, 'formulation'):
+                formulation = build_formulation(edges, n, M, m, T, reduce, greedy, lazy, telemetry, named, compact=compact,
+                                                start=start, bound=bound)
+            solution = solver.solve(formulation, solution_file, log_file, model_file, memory, threads, telemetry)
+            if not expand or not (solution.horizon_tight or solution.status == 'infeasible'):
+                break
+            longer = expand_horizon(edges, n, m, T)
+            if longer is None:
+                break
+            T = longer
+            if solution.status == 'infeasible':
+                print('No solution within the horizon, expanding horizon to '+str(T))
+            else:
+                print('Solution needs the last period, expanding horizon to '+str(T))
+        if expand and solution.status == 'optimal' and expand_horizon(edges, n, m, T) is not None:
+            # nobody infected on the last period does not prove that longer cascades cannot do better
+            solution.status = 'feasible'
+        if checkpoint:
+            checkpoint.save()
+
+    if cache and solution.status in ('optimal', 'infeasible'):
+        result_cache.put(key, solution.to_dict(), cache)
+    write_solution(solution, result_file, telemetry, phases=phases, activation_file=activation_file)
+    if telemetry:
+        solution.stats['phases'] = telemetry.phases()
+    return solution
+
+def write_solution(solution, result_file=None, telemetry=None, cached=False, phases=False, activation_file=None):
+    ''' Prints the solution and writes it to the result file, the activation file and the telemetry
+    phases : also print the phases recorded by the telemetry
+    '''
+    print_solution(solution)
+    if phases:
+        print_phases(telemetry.phases())
+    if result_file:
+        with open(result_file, 'w') as file:
+            json.dump(solution.to_dict(), file)
+    if activation_file:
+        write_activation(solution, activation_file)
+    if telemetry:
+        telemetry.record('result', cached=cached, **solution.to_dict())
+        telemetry.close()
+
+def write_activation(solution, filename):
+    ''' Writes the reached people in the format of the graph files: the number of people
+    on the first line, then one line 'person period' per reached person, the seeds on period 0.
+    Nothing is written without a solution
+    '''
+    if solution.activation is None:
+        return
+    with open(filename, 'w') as file:
+        file.write(str(len(solution.activation))+'\n')
+        for i in solution.reached():
+            file.write(str(i)+' '+str(solution.activation[i])+'\n')
+
+def print_solution(solution):
+    print('Status: '+solution.status)
+    if solution.seeds is not None:
+        print('\nSeeds: '+str(solution.seeds))
+        print('On the last step we have '+str(solution.infected)+' amount of people!')
+        print('\nObjective value:'+str(solution.objective))
+    else:
+        print('No solution available.')
+
+def read_result(filename):
+    ''' Reads a result written by run, returns None if there is none '''
+    try:
+        with open(filename) as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return None
+
+def command(backend, m, M, graph_filename, sol_filename, log_filename, greedy, result_filename=None, gurobi='gurobi.sh', threads=None, telemetry_filename=None, checkpoint_filename=None, compact=False, lazy=False):
+    ''' Shell command used by the batch runners to solve one graph
+    gurobi : the gurobi python launcher (gurobi.sh or gurobi.bat), other backends use python3
+    compact, lazy : smaller models, see model_size.admit
+    '''
+    if backend == 'gurobi':
+        command = gurobi+' gurobi_ip_project.py '
+    else:
+        command = 'python3 ip_solver.py --backend '+backend+' '
+    command += str(m)+' '+ str(M)+' '+graph_filename+' -o '+sol_filename+' -l '+log_filename
+    if result_filename:
+        command += ' -r '+result_filename
+    if telemetry_filename:
+        command += ' -t '+telemetry_filename
+    if checkpoint_filename:
+        command += ' --checkpoint '+checkpoint_filename
+    if threads:
+        command += ' --threads '+str(threads)
+    if greedy:
+        command += ' --greedy'
+    if compact:
+        command += ' --compact'
+    if lazy:
+        command += ' --lazy'
+    return command
+
+def main(backend='gurobi'):
+    parser = argparse.ArgumentParser(description='Solve a advertisement spreading over social network problem')
+    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    parser.add_argument('M', type=int, help='minimum number of people who we want to have installed the app')
+    parser.add_argument('friends_file', help='file defining the social network')
+    parser.add_argument('-o', '--output', help='name the output file (default: solution.sol)')
+    parser.add_argument('-m', '--model', help='save the model (after running solve) to a file')
+    parser.add_argument('-l', '--log', help='change log file name')
+    parser.add_argument('--names', action='store_true', help='name the variables and constraints like x[i,t] and Link1_k, to debug the model saved with -m')
+    parser.add_argument('-r', '--result', help='write the result (status, objective, seeds and solver statistics) to a json file')
+    parser.add_argument('-t', '--telemetry', help='write the build phases and the progress of the solver to a json lines file')
+    parser.add_argument('-a', '--activation', help='write the period every reached person got infected on to a file, one \'person period\' line each')
+    parser.add_argument('--phases', action='store_true', help='print the time, python memory and model size of every build phase')
+    parser.add_argument('--profile', help='write a cProfile dump of the run to a file and print the most expensive functions')
+    parser.add_argument('--backend', default=backend, choices=sorted(BACKENDS), help='solver used (default: '+backend+')')
+    parser.add_argument('--threads', type=int, default=4, help='number of threads used by the solver (default: 4)')
+    parser.add_argument('--memory', action='store_true', help='activates NodefileStart param at 0.5Gb to reduce memory usage')
+    parser.add_argument('--horizon', default='safe', help="number of periods: safe (default, bound on the cascade length), full (one per person), greedy (length of the greedy cascade) or a number")
+    parser.add_argument('--expand-horizon', action='store_true', help='solve again with more periods while the solution infects someone on the last period or there is none, the solution is only optimal with a safe horizon')
+    parser.add_argument('--compact', action='store_true', help='model without the y variables: one threshold row per person and period instead of the PeerPressure and big-M Link rows')
+    parser.add_argument('--checkpoint', help='keep the best seeds and bound of the solve in this json file, a killed solve started again with it resumes from them')
+    parser.add_argument('--lazy', action='store_true', help='leave the big-M Link2 rows out of the model and add the ones violated by new solutions')
+    parser.add_argument('--no-cache', action='store_true', help='solve even if the result is in the cache, and do not cache it')
+    parser.add_argument('--cache-dir', default=result_cache.CACHE_DIR, help='folder of the result cache (default: '+result_cache.CACHE_DIR+')')
+    parser.add_argument('--decompose', nargs='?', type=int, const=0, metavar='WORKERS', help='solve the connected components apart and combine them, with WORKERS processes (default: one per core)')
+    parser.add_argument('--no-presolve', action='store_true', help='build the model over the whole graph without the presolve')
+    parser.add_argument('--greedy', nargs='?', const='degree', choices=sorted(GREEDY_STRATEGIES), help='seed the problem with an initial feasible solution using greedy algorithm (default: degree, celf picks the largest marginal gain, search anneals the celf seeds, see local_search.py)')
+
+    args = parser.parse_args()
+    if args.lazy and args.backend not in LAZY_BACKENDS:
+        parser.error('--lazy needs a backend with lazy constraint callbacks: '+', '.join(LAZY_BACKENDS))
+    # extract user input
+    solution_file = args.output +'.sol' if args.output else 'solution.sol'
+    if args.profile:
+        profile = cProfile.Profile()
+        profile.enable()
+    run(args.friends_file, args.m, args.M, solution_file, args.model, args.log, args.greedy, args.horizon,
+        args.expand_horizon, not args.no_presolve, args.backend, args.memory, args.result, args.threads, args.lazy,
+        None if args.no_cache else args.cache_dir, args.telemetry, args.phases, args.activation, args.names,
+        args.decompose, args.compact, checkpoint_file=args.checkpoint)
+    if args.profile:
+        profile.disable()
+        profile.dump_stats(args.profile)
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(20)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,133 @@
+''' Simulated annealing over seed sets, for graphs too large for the IP.
+
+The objective is the one of the IP model, w1 * seeds + d with w1 = 1+n-M and
+d = n - people infected at the end, over seed sets of at least m seeds that
+infect at least M people, everybody can be a seed. Every move drops a random
+seed from the cascade of the current seeds with Cascade.remove. When more than
+m seeds are left and the other seeds still infect M people the seed stays
+removed, otherwise a few uninfected people drawn at random are tried in its
+place with Cascade.gain, and the best of them is swapped in. Removals always
+lower the objective, swaps are accepted with the annealing rule as the
+temperature cools down to 0 at the end of the time budget, and a rejected swap
+adds the seed back. The one cascade is kept over all the moves, a move only
+visits the part of it that the dropped and added seeds infect.
+'''
+import argparse
+from math import exp
+from random import Random
+from time import time
+from cascade import Cascade, simulate
+from formulation import Solution
+from greedy import GREEDY_STRATEGIES
+from ip_solver import write_solution
+from social_network import load
+
+TIME_LIMIT = 10.0
+
+def objective(n, M, seeds, infected):
+    ''' Objective value of the IP model for a seed set '''
+    return (1+n-M)*seeds + n - infected
+
+def improve(edges, m, M, solution, time_limit=TIME_LIMIT, seed=None, temperature=None, tries=5, report=None):
+    ''' Anneals a seed set that infects at least M people
+    edges       : friendship graph
+    m           : minimum number of people needed to infected new person
+    M           : required number of people we need at the end
+    solution    : initial 0/1 solution, it must infect at least M people, the people infecting the most
+                  are added to it while it has fewer than m seeds
+    time_limit  : seconds spent searching
+    seed        : seed of the random generator
+    temperature : initial temperature in people (default: 1% of the people)
+    tries       : number of people tried in place of a dropped seed
+    report      : called with (seconds, seeds, infected) every time a better solution is found
+    returns the best 0/1 solution found
+    '''
+    n = len(edges)
+    rng = Random(seed)
+    temperature = temperature if temperature is not None else max(1.0, 0.01*n)
+    seeds = [i for i in range(n) if solution[i]]
+    cascade = Cascade(edges, m, n)
+    cascade.add(seeds)
+    # constraint 6 of the IP, the greedy seeds stop as soon as M people are infected
+    while len(seeds) < min(m, n):
+        gained, person = max((cascade.gain([i]), i) for i in range(n) if i not in cascade.seeds)
+        cascade.add([person])
+        seeds.append(person)
+    activation = cascade.activation
+    infected = cascade.infected
+    cost = objective(n, M, len(seeds), infected)
+    best_seeds, best_cost = list(seeds), cost
+    start = time()
+    if report:
+        report(0.0, len(best_seeds), infected)
+
+    while seeds and time() - start < time_limit:
+        # drop a random seed from the cascade
+        k = rng.randrange(len(seeds))
+        dropped = seeds[k]
+        others = seeds[:k] + seeds[k+1:]
+        cascade.remove([dropped])
+        if len(others) >= m and cascade.infected >= M:
+            seeds, infected = others, cascade.infected
+        else:
+            # swap it for the best of a few uninfected people, drawn until tries are found or enough draws failed
+            candidates = set()
+            for draw in range(20 * tries):
+                i = rng.randrange(n)
+                if activation[i] is None and i != dropped:
+                    candidates.add(i)
+                    if len(candidates) == tries:
+                        break
+            gained, person = max((cascade.gain([i]), i) for i in candidates) if candidates else (0, None)
+            new_cost = objective(n, M, len(seeds), cascade.infected + gained)
+            cooled = temperature * (1 - (time() - start) / time_limit)
+            if cascade.infected + gained < M or (new_cost > cost and (cooled <= 0 or rng.random() >= exp((cost - new_cost) / cooled))):
+                cascade.add([dropped])
+                continue
+            cascade.add([person])
+            seeds, infected = others + [person], cascade.infected
+        cost = objective(n, M, len(seeds), infected)
+        if cost < best_cost:
+            best_seeds, best_cost = list(seeds), cost
+            if report:
+                report(time() - start, len(best_seeds), infected)
+
+    best = [0] * n
+    for i in best_seeds:
+        best[i] = 1
+    return best
+
+def run(friends_file, m, M, time_limit=TIME_LIMIT, seed=None, greedy='celf', result_file=None, activation_file=None):
+    ''' Loads the graph, anneals the greedy seeds and prints the solution
+    returns a formulation.Solution
+    '''
+    edges,n = load(friends_file)
+    start = time()
+    f = [len(edges[i]) for i in range(n)]
+    solution = GREEDY_STRATEGIES[greedy](edges, f, m, M)
+    print('Greedy solution found in '+str(round(time() - start, 3))+' seconds')
+
+    def report(seconds, seeds, infected):
+        print(str(round(seconds, 3))+'s: '+str(seeds)+' seeds infect '+str(infected)+' people')
+
+    solution = improve(edges, m, M, solution, time_limit, seed, report=report)
+    seeds = [i for i in range(n) if solution[i]]
+    infected, activation = simulate(edges, seeds, m, n)
+    result = Solution('feasible', objective(n, M, len(seeds), infected), seeds, infected,
+                      {'time': time() - start}, activation=activation)
+    write_solution(result, result_file, activation_file=activation_file)
+    return result
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Find few seeds infecting at least M people with simulated annealing, without the IP')
+    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    parser.add_argument('M', type=int, help='minimum number of people who we want to have installed the app')
+    parser.add_argument('friends_file', help='file defining the social network')
+    parser.add_argument('-t', '--time', type=float, default=TIME_LIMIT, help='seconds spent searching (default: '+str(TIME_LIMIT)+')')
+    parser.add_argument('-r', '--result', help='write the result (status, objective, seeds) to a json file')
+    parser.add_argument('-a', '--activation', help='write the step every reached person got infected on to a file, one \'person step\' line each')
+    parser.add_argument('--seed', type=int, help='seed of the random generator')
+    parser.add_argument('--greedy', default='celf', choices=['degree', 'celf'], help='initial solution (default: celf)')
+    args = parser.parse_args()
+
+    run(args.friends_file, args.m, args.M, args.time, args.seed, args.greedy, args.result, args.activation)
@@ -0,0 +1,143 @@
+''' Size and memory of a model, estimated before building it.
+
+The number of columns, rows and nonzeros of formulation.build_formulation only
+depends on the people left by the presolve, their friendships, the seed-only
+groups and the horizon, so they are counted exactly without building anything.
+The memory is a linear function of these counts: BASE holds the bytes of each
+backend before the build and BYTES the bytes per column, row and nonzero of the
+formulation (python lists) and the model of the backend together. They are
+fitted with non-negative least squares on the ru_maxrss of 188 builds of G(n,p)
+graphs with 100 to 800 people, m = 2 or 3, standard, lazy and compact (within
+4% for gurobi and 12% for highs and cplex). It is the peak of the build; the
+branch and bound tree comes on top of it, see --memory.
+
+admit picks the first model of DOWNGRADES that fits a memory budget, the batch
+runners use it to refuse the graphs that do not fit and to pack their
+concurrent solves under the memory of the machine.
+'''
+import argparse
+from horizon import estimate_horizon
+from ip_solver import BACKENDS, LAZY_BACKENDS
+from presolve import presolve
+from social_network import load
+
+# bytes per (column, row, nonzero) of the formulation and the model of the backend.
+# The zeros are not dropped terms: highs has no lazy model and its rows are always
+# twice its columns, so the fit can only tell their sum and puts it on the rows,
+# and with cplex the rows cost nothing beyond their nonzeros.
+BYTES = {
+    'gurobi': (1367, 107, 40.4),
+    'highs': (0, 350, 74.2),
+    'cplex': (799, 0, 41.0),
+}
+# python, the solver library and the graph, before the build
+BASE = {
+    'gurobi': 30 * 2**20,
+    'highs': 40 * 2**20,
+    'cplex': 32 * 2**20,
+}
+# part of a budget kept for the error of the estimate and the search tree
+MARGIN = 0.2
+# options of ip_solver.run tried in order when a model does not fit, from the largest model
+DOWNGRADES = [{}, {'lazy': True}, {'compact': True}]
+
+def downgrades(backend):
+    ''' Models of DOWNGRADES the backend can solve, only LAZY_BACKENDS leave the lazy rows out '''
+    return [options for options in DOWNGRADES if backend in LAZY_BACKENDS or not options.get('lazy')]
+
+def dimensions(people, friendships, groups, T, compact=False, lazy=False, never=0):
+    ''' (columns, rows, nonzeros) of the model of formulation.build_formulation
+    people      : people kept in the cascade by the presolve (n without it)
+    friendships : sum over the kept people of their number of friends and friend groups (2|E| without the presolve)
+    groups      : seed-only groups of the presolve
+    T           : last period of the model
+    never       : people with less than m friends left in the cascade, seeds or never infected (only without the presolve)
+    '''
+    P, F, G = people, friendships, groups
+    columns = P*(T+1)*(1 if compact else 2) + G + 1 + never
+    # RequiredNumberOfPeople, InfectAsManyPeopleAsPossible, MinimumSeed and AppWillHauntYouForever
+    rows = 3 + P*T
+    nonzeros = 3*(P+G) + 1 + 2*P*T
+    if compact:
+        # Threshold
+        rows += P*T
+        nonzeros += T*(2*P + F)
+    else:
+        # PeerPressure, Link1 and Link2 unless it is lazy
+        links = 1 if lazy else 2
+        rows += P*T + links*P*T
+        nonzeros += 3*P*T + links*T*(P + F)
+    # NeverInfected
+    rows += never
+    nonzeros += never*(T+2)
+    return columns, rows, nonzeros
+
+def graph_counts(edges, n, m, reduce=True):
+    ''' (people, friendships, groups, never) of the graph for dimensions, from the presolve '''
+    reduced = presolve(edges, n, m, reduce=reduce)
+    people = len(reduced.people)
+    friendships = sum(len(reduced.edges[k]) + len(reduced.friend_groups[k]) for k in range(people))
+    never = 0 if reduce else sum(1 for i in range(n) if len(edges.get(i, ())) < m)
+    return people, friendships, len(reduced.groups), never
+
+def memory(columns, rows, nonzeros, backend='gurobi'):
+    ''' Estimated peak bytes of building the formulation and the model of the backend '''
+    a, b, c = BYTES[backend]
+    return int(BASE[backend] + a*columns + b*rows + c*nonzeros)
+
+def estimate(edges, n, m, T=None, horizon='safe', backend='gurobi', reduce=True, compact=False, lazy=False, counts=None):
+    ''' Estimated size of the model of a graph, as a dict with the 'T', 'columns', 'rows', 'nonzeros'
+    and 'bytes' of the build
+    T      : last period of the model (default: estimate_horizon(horizon))
+    counts : graph_counts(edges, n, m, reduce), to reuse them over many calls
+    '''
+    T = estimate_horizon(edges, n, m, horizon) if T is None else T
+    people, friendships, groups, never = graph_counts(edges, n, m, reduce) if counts is None else counts
+    columns, rows, nonzeros = dimensions(people, friendships, groups, T, compact, lazy, never)
+    return {'T': T, 'columns': columns, 'rows': rows, 'nonzeros': nonzeros,
+            'bytes': memory(columns, rows, nonzeros, backend)}
+
+def admit(edges, n, m, budget, horizon='safe', backend='gurobi', reduce=True, margin=MARGIN):
+    ''' First model of downgrades(backend) whose build fits in budget bytes, less the margin
+    returns (options of ip_solver.run, estimate) or (None, estimate of the smallest model) if none fits
+    '''
+    T = estimate_horizon(edges, n, m, horizon)
+    counts = graph_counts(edges, n, m, reduce)
+    for options in downgrades(backend):
+        size = estimate(edges, n, m, T, backend=backend, counts=counts, **options)
+        if size['bytes'] <= budget * (1 - margin):
+            return options, size
+    return None, size
+
+def admit_file(friends_file, m, budget, horizon='safe', backend='gurobi', reduce=True, margin=MARGIN):
+    ''' admit for the graph of a file '''
+    edges,n = load(friends_file)
+    return admit(edges, n, m, budget, horizon, backend, reduce, margin)
+
+def describe(options):
+    ''' Name of a model of DOWNGRADES '''
+    return ','.join(options) or 'standard'
+
+def gigabytes(size):
+    return str(round(size / 2.0**30, 3))+' GB'
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Estimate the size and memory of the model of a graph before building it')
+    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    parser.add_argument('friends_file', help='file defining the social network')
+    parser.add_argument('--backend', default='gurobi', choices=sorted(BACKENDS), help='solver used (default: gurobi)')
+    parser.add_argument('--horizon', default='safe', help='number of periods, see ip_solver.py (default: safe)')
+    parser.add_argument('--no-presolve', action='store_true', help='estimate the model built without the graph presolve')
+    parser.add_argument('--budget', type=float, help='memory budget in GB, prints the model that fits in it')
+    args = parser.parse_args()
+
+    edges,n = load(args.friends_file)
+    T = estimate_horizon(edges, n, args.m, args.horizon)
+    counts = graph_counts(edges, n, args.m, not args.no_presolve)
+    for options in downgrades(args.backend):
+        size = estimate(edges, n, args.m, T, backend=args.backend, counts=counts, **options)
+        print('%-10s T %d: %d columns, %d rows, %d nonzeros, %s' % (describe(options), size['T'], size['columns'],
+              size['rows'], size['nonzeros'], gigabytes(size['bytes'])))
+    if args.budget:
+        options, size = admit(edges, n, args.m, args.budget * 2**30, args.horizon, args.backend, not args.no_presolve)
+        print('Does not fit in '+str(args.budget)+' GB' if options is None else 'Fits in '+str(args.budget)+' GB as '+describe(options))
@@ -0,0 +1,81 @@
+''' Graph presolve run before the IP models are built.
+
+People with fewer than m friends can never be infected by their friends, they
+are either seeds or never infected. Their x variables are the same on every
+period, so they only need one variable, and people whose friends look the same
+to the cascade can share it. They still count as friends of the others when
+they are seeds.
+'''
+
+class ReducedGraph:
+    ''' Friendship graph left after the presolve.
+
+    n             : number of people in the original graph
+    people        : people[k] is the original id of the k-th person kept in the cascade
+    edges         : friendship graph between the kept people, renumbered 0,...,len(people)-1
+    groups        : groups[g] are the original ids of people that can only be seeds,
+                    any member can replace any other one
+    friend_groups : friend_groups[k] are the groups whose members are all friends of kept person k
+    '''
+    def __init__(self, n, people, edges, groups, friend_groups):
+        self.n = n
+        self.people = people
+        self.edges = edges
+        self.groups = groups
+        self.friend_groups = friend_groups
+
+    def group_seeds(self, solution):
+        ''' Number of seeds in each group for a 0/1 solution over the original people '''
+        return [sum(1 for i in group if solution[i]) for group in self.groups]
+
+    def lift(self, seeds, group_seeds):
+        ''' Seeds of the original graph as a 0/1 list
+        seeds       : 0/1 values of the kept people on the first period
+        group_seeds : number of seeds taken from each group
+        '''
+        solution = [0] * self.n
+        for k, seeded in enumerate(seeds):
+            if seeded > 0.5:
+                solution[self.people[k]] = 1
+        for group, count in zip(self.groups, group_seeds):
+            for i in group[:int(round(count))]:
+                solution[i] = 1
+        return solution
+
+def presolve(edges, n, m, reduce=True):
+    ''' Splits the people into cascade people and seed-only groups
+    edges  : friendship graph
+    n      : number of nodes in graph
+    m      : number of friends needed to influence someone to install the app
+    reduce : if False everybody stays in the cascade (no presolve)
+    returns a ReducedGraph
+    '''
+    friends = [set(edges.get(i, ())) for i in range(n)]
+    if not reduce:
+        people = list(range(n))
+        return ReducedGraph(n, people, {i: sorted(friends[i]) for i in people}, [], [[] for i in people])
+
+    # people with less than m friends can only be seeds
+    seed_only = [i for i in range(n) if len(friends[i]) < m]
+    removed = set(seed_only)
+    people = [i for i in range(n) if i not in removed]
+    index = {i: k for k, i in enumerate(people)}
+    reduced_edges = {}
+    for k, i in enumerate(people):
+        reduced_edges[k] = sorted(index[j] for j in friends[i] if j in index)
+
+    # seed-only people with the same friends in the cascade are interchangeable,
+    # this collapses the leaves hanging off the same person into one group
+    by_friends = {}
+    for i in seed_only:
+        key = tuple(sorted(index[j] for j in friends[i] if j in index))
+        by_friends.setdefault(key, []).append(i)
+    groups = []
+    friend_groups = [[] for i in people]
+    for key in sorted(by_friends):
+        for k in key:
+            friend_groups[k].append(len(groups))
+        groups.append(by_friends[key])
+
+    print('Presolve kept '+str(len(people))+' people, '+str(len(seed_only))+' seed-only people in '+str(len(groups))+' groups')
+    return ReducedGraph(n, people, reduced_edges, groups, friend_groups)
@@ -1,42 +1,164 @@
 import argparse
+import os
+from math import isqrt, log
+from random import Random
 
-def generate( filename, n):
-    from random import randint
-    # construct matrix M to be an upper triangular matrix of an undirected graph
-    M = [[0]*n for i in range(n)]
-    
-    
-    # N = number of edges
-    max_edges = n*(n-1)/2
-    N = randint(int(max_edges/4), int(max_edges/3))
-    E = set()
-    while len(E) < N:
-        k,l = 0,0
-        while k == l:
-            k = randint(0,n-1)
-            l = randint(0,n-1)
-        if k < l:
-            E.add((k,l))
-        else: 
-            E.add((l,k))
-    for e in E:
-        i,j = e
+def _pair(k):
+    ''' k-th pair (i, j) with i < j in the order (0,1), (0,2), (1,2), (0,3), ... '''
+    j = (1 + isqrt(1 + 8*k)) // 2
+    return k - j*(j-1)//2, j
+
+def _skip(count, p, rng):
+    ''' Indices of range(count) each kept with probability p, jumping over the skipped ones '''
+    if p <= 0:
+        return
+    if p >= 1:
+        yield from range(count)
+        return
+    lp = log(1 - p)
+    k = -1
+    while True:
+        k += 1 + int(log(1.0 - rng.random()) / lp)
+        if k >= count:
+            return
+        yield k
+
+def gnm_edges(n, N, rng):
+    ''' N distinct friendships drawn uniformly, in order (selection sampling) '''
+    left = n*(n-1)//2
+    for j in range(1, n):
+        for i in range(j):
+            # each pair is kept with probability friendships left / pairs left
+            if rng.random() * left < N:
+                N -= 1
+                yield i, j
+                if N == 0:
+                    return
+            left -= 1
+
+def gnp_edges(n, p, rng):
+    ''' Every friendship with probability p (G(n,p)) '''
+    for k in _skip(n*(n-1)//2, p, rng):
+        yield _pair(k)
+
+def barabasi_albert_edges(n, k, rng):
+    ''' Each new person befriends k people chosen proportionally to their number of friends '''
+    targets = list(range(k))
+    # every person appears once per friend
+    repeated = []
+    for source in range(k, n):
+        for target in targets:
+            yield target, source
+        repeated.extend(targets)
+        repeated.extend([source] * k)
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(rng.choice(repeated))
+        targets = sorted(chosen)
+
+def watts_strogatz_edges(n, k, beta, rng):
+    ''' Ring where everybody knows their k nearest neighbours, each friendship rewired with probability beta '''
+    friends = [set() for i in range(n)]
+    for i in range(n):
+        for j in range(1, k//2 + 1):
+            friends[i].add((i+j) % n)
+            friends[(i+j) % n].add(i)
+    for j in range(1, k//2 + 1):
+        for i in range(n):
+            v = (i+j) % n
+            if rng.random() < beta and len(friends[i]) < n-1 and v in friends[i]:
+                w = rng.randrange(n)
+                while w == i or w in friends[i]:
+                    w = rng.randrange(n)
+                friends[i].discard(v)
+                friends[v].discard(i)
+                friends[i].add(w)
+                friends[w].add(i)
+    for i in range(n):
+        for j in friends[i]:
+            if i < j:
+                yield i, j
+
+def block_edges(sizes, p_in, p_out, rng):
+    ''' Stochastic block model, friends with probability p_in inside a block and p_out across blocks '''
+    starts = [sum(sizes[:b]) for b in range(len(sizes))]
+    for a in range(len(sizes)):
+        for k in _skip(sizes[a]*(sizes[a]-1)//2, p_in, rng):
+            i, j = _pair(k)
+            yield starts[a]+i, starts[a]+j
+        for b in range(a+1, len(sizes)):
+            for k in _skip(sizes[a]*sizes[b], p_out, rng):
+                yield starts[a] + k // sizes[b], starts[b] + k % sizes[b]
+
+MODELS = ['gnm', 'gnp', 'ba', 'ws', 'sbm']
+
+def edges(n, model='gnm', rng=None, p=None, k=None, beta=0.1, blocks=None, p_in=None, p_out=None):
+    ''' Friendships of a random graph with n people
+    model  : gnm (between a quarter and a third of all the friendships, the default),
+             gnp (probability p), ba (Barabasi-Albert, k friends per new person),
+             ws (Watts-Strogatz, k nearest neighbours rewired with probability beta)
+             or sbm (stochastic block model, blocks blocks of equal size with p_in and p_out)
+    '''
+    rng = rng if rng else Random()
+    if model == 'gnm':
+        max_edges = n*(n-1)//2
+        N = rng.randint(int(max_edges/4), int(max_edges/3))
+        return gnm_edges(n, N, rng)
+    if model == 'gnp':
+        return gnp_edges(n, p, rng)
+    if model == 'ba':
+        return barabasi_albert_edges(n, k, rng)
+    if model == 'ws':
+        return watts_strogatz_edges(n, k, beta, rng)
+    if model == 'sbm':
+        sizes = [n // blocks + (1 if b < n % blocks else 0) for b in range(blocks)]
+        return block_edges(sizes, p_in, p_out, rng)
+    raise ValueError('unknown model '+model)
+
+def generate( filename, n, model='gnm', seed=None, binary=False, **params):
+    ''' Writes a random graph, the edges are streamed to the file as they are drawn
+    filename : output file, a text edge list after a line with n
+    seed     : seed of the random generator, the same seed gives the same graph
+    binary   : write the CSR format of csr_graph.py instead
+    params   : parameters of the model, see edges
+    '''
+    rng = Random(seed)
+    text_filename = filename + '.txt.tmp' if binary else filename
     # construct the file
-    with open(filename, 'w') as file:
+    with open(text_filename, 'w') as file:
         file.write(str(n)+'\n')
-        for e in E:
-            i,j = e
+        for i,j in edges(n, model, rng, **params):
             file.write(str(i)+' '+str(j)+'\n')
-            
+    if binary:
+        from csr_graph import convert
+        convert(text_filename, filename)
+        os.remove(text_filename)
+
 if __name__=='__main__':
     parser = argparse.ArgumentParser(description='Generate a random undirected social network graph')
     parser.add_argument('n', type=int, help='number of people (min 2)')
     parser.add_argument('-o', '--output', help="set the output file's name (default: output.txt)")
+    parser.add_argument('--model', default='gnm', choices=MODELS, help='random graph model (default: gnm, a quarter to a third of all the friendships)')
+    parser.add_argument('-p', type=float, help='probability of a friendship (gnp)')
+    parser.add_argument('-k', type=int, help='friends of each new person (ba) or nearest neighbours (ws)')
+    parser.add_argument('--beta', type=float, default=0.1, help='rewiring probability (ws, default: 0.1)')
+    parser.add_argument('--blocks', type=int, help='number of blocks (sbm)')
+    parser.add_argument('--p-in', type=float, help='probability of a friendship inside a block (sbm)')
+    parser.add_argument('--p-out', type=float, help='probability of a friendship across blocks (sbm)')
+    parser.add_argument('--seed', type=int, help='seed of the random generator')
+    parser.add_argument('--binary', action='store_true', help='write the binary CSR format of csr_graph.py')
     args = parser.parse_args()
     # extract arguments
     n = args.n if args.n >= 2 else 2
     filename = args.output if args.output else 'output.txt'
-    
-    generate( filename, n)
-    
-                    
\ No newline at end of file
+    params = {'gnm': {}, 'gnp': {'p': args.p}, 'ba': {'k': args.k}, 'ws': {'k': args.k, 'beta': args.beta},
+              'sbm': {'blocks': args.blocks, 'p_in': args.p_in, 'p_out': args.p_out}}[args.model]
+    missing = [name for name, value in params.items() if value is None]
+    if missing:
+        parser.error('--model '+args.model+' needs '+', '.join(('-' if len(name) == 1 else '--')+name.replace('_', '-') for name in missing))
+    if args.model in ('ba', 'ws') and not 0 < args.k < n:
+        parser.error('-k must be between 1 and n-1')
+    if args.model == 'sbm' and not 0 < args.blocks <= n:
+        parser.error('--blocks must be between 1 and n')
+
+    generate( filename, n, args.model, args.seed, args.binary, **params)
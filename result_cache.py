@@ -0,0 +1,62 @@
+''' On-disk cache of solve results.
+
+A result is stored as a json file named after the hash of the friendships and
+of the parameters of the solve. Reading a result touches its file, and once
+the cache holds more than max_entries results the least recently used ones
+are deleted.
+'''
+import hashlib
+import json
+import os
+from array import array
+from os.path import join
+
+CACHE_DIR = '.solve_cache'
+MAX_ENTRIES = 1000
+# layout of the cached results, changing it invalidates them
+FORMAT = 2
+
+def graph_hash(edges, n):
+    ''' Hash of the friendships, the same for any order or repetition of the lines of the file '''
+    digest = hashlib.sha256(str(n).encode())
+    for i in range(n):
+        friends = sorted(j for j in edges[i] if j > i)
+        digest.update(array('q', [i, len(friends)] + friends).tobytes())
+    return digest.hexdigest()
+
+def cache_key(edges, n, m, M, horizon, backend, **options):
+    ''' Key of a solve
+    options : other parameters changing the result or its statistics (greedy strategy, ...)
+    '''
+    parameters = {'m': m, 'M': M, 'horizon': horizon, 'backend': backend, 'format': FORMAT}
+    parameters.update(options)
+    return hashlib.sha256((graph_hash(edges, n) + json.dumps(parameters, sort_keys=True)).encode()).hexdigest()
+
+def get(key, folder=CACHE_DIR):
+    ''' Cached result of the key as a dict (see formulation.Solution.to_dict), None if there is none '''
+    filename = join(folder, key+'.json')
+    try:
+        with open(filename) as file:
+            result = json.load(file)
+    except (IOError, ValueError):
+        return None
+    os.utime(filename)
+    return result
+
+def put(key, result, folder=CACHE_DIR, max_entries=MAX_ENTRIES):
+    ''' Stores a result dict and evicts the least recently used results '''
+    os.makedirs(folder, exist_ok=True)
+    filename = join(folder, key+'.json')
+    # write then rename so readers never see half a file
+    with open(filename+'.tmp', 'w') as file:
+        json.dump(result, file)
+    os.replace(filename+'.tmp', filename)
+
+    entries = [entry for entry in os.scandir(folder) if entry.name.endswith('.json')]
+    if len(entries) > max_entries:
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
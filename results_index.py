@@ -0,0 +1,251 @@
+''' SQLite index of the files written by the batch runners.
+
+The runners leave folders like superpack/n10m2/ holding the graphs
+(random_graph_<i>.txt), the gurobi logs (random_graph_<i>_[greedy]_log.txt),
+the solutions (random_graph_<i>_[greedy]_solution[.sol]) and, for the newer
+runs, the results (random_graph_<i>_[greedy]_result.json). The index reads all
+of them into one database with a table per kind of file, and the runs view
+with a row per solve, so questions are SQL queries instead of walks over the
+tree (see QUERIES).
+
+Updating the index only reads the files whose modification time or size
+changed since the last update, and only parses those whose content hash
+changed, in parallel. Rows of deleted files are removed.
+'''
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join, relpath
+from gurobi_log_parser import summary
+from social_network import load
+
+DATABASE = 'results.sqlite'
+# version of SCHEMA, an index of another version is built again
+VERSION = 3
+# kind of file, pattern of its name with the index of the graph and greedy
+PATTERNS = [
+    ('graph', re.compile(r'random_graph_(\d+)\.txt$')),
+    ('log', re.compile(r'random_graph_(\d+)_(greedy)?_log\.txt$')),
+    ('solution', re.compile(r'random_graph_(\d+)_(greedy)?_solution(\.sol)?$')),
+    ('result', re.compile(r'random_graph_(\d+)_(greedy)?_result\.json$')),
+]
+FOLDER = re.compile(r'n(\d+)m(\d+)$')
+# columns of the table of each kind of file, after path, folder, n, m, graph (and greedy but for graphs)
+COLUMNS = {
+    'graph': ['people', 'friendships', 'max_degree'],
+    'log': ['status', 'objective', 'bound', 'gap', 'nodes', 'explored', 'iterations', 'time', 'steps', 'rows', 'columns', 'nonzeros'],
+    'solution': ['objective', 'seeds', 'seed_list'],
+    'result': ['status', 'objective', 'seeds', 'infected', 'time', 'nodes', 'iterations'],
+}
+TABLES = {'graph': 'graphs', 'log': 'logs', 'solution': 'solutions', 'result': 'results'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, kind TEXT, mtime REAL, size INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS graphs (path TEXT PRIMARY KEY, folder TEXT, n INTEGER, m INTEGER, graph INTEGER,
+    people INTEGER, friendships INTEGER, max_degree INTEGER);
+CREATE TABLE IF NOT EXISTS logs (path TEXT PRIMARY KEY, folder TEXT, n INTEGER, m INTEGER, graph INTEGER, greedy INTEGER,
+    status TEXT, objective REAL, bound REAL, gap REAL, nodes INTEGER, explored INTEGER, iterations INTEGER, time REAL, steps INTEGER,
+    rows INTEGER, columns INTEGER, nonzeros INTEGER);
+CREATE TABLE IF NOT EXISTS solutions (path TEXT PRIMARY KEY, folder TEXT, n INTEGER, m INTEGER, graph INTEGER, greedy INTEGER,
+    objective REAL, seeds INTEGER, seed_list TEXT);
+CREATE TABLE IF NOT EXISTS results (path TEXT PRIMARY KEY, folder TEXT, n INTEGER, m INTEGER, graph INTEGER, greedy INTEGER,
+    status TEXT, objective REAL, seeds INTEGER, infected INTEGER, time REAL, nodes INTEGER, iterations INTEGER);
+CREATE INDEX IF NOT EXISTS logs_run ON logs (folder, graph, greedy);
+CREATE INDEX IF NOT EXISTS solutions_run ON solutions (folder, graph, greedy);
+CREATE INDEX IF NOT EXISTS results_run ON results (folder, graph, greedy);
+-- a row per solve, from its result file when there is one, else from its log and solution,
+-- with the nodes explored at the end of the solve like the results
+CREATE VIEW IF NOT EXISTS runs AS
+    SELECT l.folder, l.n, l.m, l.graph, l.greedy, l.status, l.objective, s.seeds, l.time, l.explored AS nodes, l.iterations, l.steps
+    FROM logs l LEFT JOIN solutions s ON s.folder = l.folder AND s.graph = l.graph AND s.greedy = l.greedy
+    WHERE NOT EXISTS (SELECT 1 FROM results r WHERE r.folder = l.folder AND r.graph = l.graph AND r.greedy = l.greedy)
+    UNION ALL
+    SELECT folder, n, m, graph, greedy, status, objective, seeds, time, nodes, iterations, NULL FROM results;
+'''
+
+QUERIES = {
+    # mean time and nodes of the solves with and without the greedy MIP start, on the graphs both solved
+    'speedup': '''
+        SELECT g.n, g.m, COUNT(*) AS graphs, AVG(p.time) AS time, AVG(g.time) AS greedy_time,
+               AVG(p.time) / AVG(g.time) AS speedup, AVG(p.nodes) AS nodes, AVG(g.nodes) AS greedy_nodes
+        FROM runs g JOIN runs p ON p.folder = g.folder AND p.graph = g.graph AND p.greedy = 0
+        WHERE g.greedy = 1 AND g.status = 'optimal' AND p.status = 'optimal'
+        GROUP BY g.n, g.m ORDER BY g.n, g.m''',
+    # number of solves of each status
+    'status': '''
+        SELECT n, m, greedy, status, COUNT(*) AS runs FROM runs GROUP BY n, m, greedy, status ORDER BY n, m, greedy, status''',
+    # mean number of seeds of the optimal solutions
+    'seeds': '''
+        SELECT n, m, COUNT(*) AS runs, AVG(seeds) AS seeds, MIN(seeds) AS fewest, MAX(seeds) AS most
+        FROM runs WHERE status = 'optimal' AND greedy = 0 GROUP BY n, m ORDER BY n, m''',
+    # every solve
+    'runs': 'SELECT * FROM runs ORDER BY n, m, graph, greedy',
+}
+
+def kind_of(name):
+    ''' (kind, graph index, greedy) of a file name, None for other files '''
+    for kind, pattern in PATTERNS:
+        match = pattern.match(name)
+        if match:
+            return kind, int(match.group(1)), kind != 'graph' and match.group(2) is not None
+    return None
+
+def file_hash(filename):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def parse_graph(filename):
+    edges,n = load(filename)
+    degrees = [len(edges[i]) for i in range(n)]
+    return {'people': n, 'friendships': sum(degrees) // 2, 'max_degree': max(degrees) if degrees else 0}
+
+def parse_solution(filename):
+    ''' Objective and seeds of a solution file with named columns, None for what it does not have '''
+    objective = None
+    seeds = []
+    named = False
+    with open(filename) as file:
+        for line in file:
+            if line.startswith('# Objective value ='):
+                objective = float(line.split('=')[1])
+                continue
+            items = line.split()
+            if len(items) == 2 and items[0].startswith('x['):
+                named = True
+                if items[0].endswith(',0]') and float(items[1]) > 0.5:
+                    seeds.append(int(items[0][2:items[0].index(',')]))
+    if not named:
+        return {'objective': objective, 'seeds': None, 'seed_list': None}
+    return {'objective': objective, 'seeds': len(seeds), 'seed_list': ' '.join(str(i) for i in sorted(seeds))}
+
+def parse_result(filename):
+    with open(filename) as file:
+        result = json.load(file)
+    stats = result.get('stats') or {}
+    seeds = result.get('seeds')
+    return {'status': result.get('status'), 'objective': result.get('objective'), 'seeds': None if seeds is None else len(seeds),
+            'infected': result.get('infected'), 'time': stats.get('time'), 'nodes': stats.get('nodes'),
+            'iterations': stats.get('iterations')}
+
+PARSERS = {'graph': parse_graph, 'log': summary, 'solution': parse_solution, 'result': parse_result}
+
+def parse(job):
+    ''' Reads a file in a worker
+    job : (filename, kind, hash of the file on the last update or None)
+    returns (hash, fields) with fields None when the hash did not change, or (None, error message)
+    '''
+    filename, kind, known = job
+    try:
+        digest = file_hash(filename)
+        if digest == known:
+            return digest, None
+        return digest, PARSERS[kind](filename)
+    except Exception as e:
+        return None, repr(e)
+
+def scan(root):
+    ''' Files of the tree the index reads, {relative path: (kind, graph, greedy, mtime, size)} '''
+    files = {}
+    for folder, folders, names in os.walk(root):
+        folders.sort()
+        for name in names:
+            kind = kind_of(name)
+            if kind:
+                filename = join(folder, name)
+                status = os.stat(filename)
+                files[relpath(filename, root)] = kind + (status.st_mtime, status.st_size)
+    return files
+
+def connect(database):
+    connection = sqlite3.connect(database)
+    if connection.execute('PRAGMA user_version').fetchone()[0] != VERSION:
+        connection.executescript('DROP VIEW IF EXISTS runs;' + ''.join('DROP TABLE IF EXISTS '+table+';' for table in ['files'] + list(TABLES.values())))
+        connection.execute('PRAGMA user_version = '+str(VERSION))
+    connection.executescript(SCHEMA)
+    return connection
+
+def update(root, database=None, workers=None):
+    ''' Brings the index of the tree up to date
+    database : file of the index (default: results.sqlite in the root)
+    workers  : processes parsing the files (default: one per core)
+    returns the number of (parsed, unchanged, deleted, failed) files
+    '''
+    connection = connect(database or join(root, DATABASE))
+    known = {path: (mtime, size, digest) for path, mtime, size, digest in connection.execute('SELECT path, mtime, size, hash FROM files')}
+    files = scan(root)
+    # the files whose time or size changed are hashed, and only parsed if their content changed
+    changed = [path for path, (kind, graph, greedy, mtime, size) in files.items() if known.get(path, (None, None))[:2] != (mtime, size)]
+    deleted = [path for path in known if path not in files]
+    jobs = [(join(root, path), files[path][0], known.get(path, (None, None, None))[2]) for path in changed]
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(jobs) < 100:
+        parsed = map(parse, jobs)
+    else:
+        pool = ProcessPoolExecutor(workers)
+        parsed = pool.map(parse, jobs, chunksize=max(1, len(jobs) // (8 * workers)))
+
+    counts = [0, len(files) - len(changed), len(deleted), 0]
+    with connection:
+        for path, (digest, fields) in zip(changed, parsed):
+            kind, graph, greedy, mtime, size = files[path]
+            if digest is None:
+                print('Cannot read '+path+': '+fields)
+                counts[3] += 1
+                continue
+            connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)', (path, kind, mtime, size, digest))
+            if fields is None:
+                counts[1] += 1
+                continue
+            counts[0] += 1
+            folder = os.path.dirname(path)
+            match = FOLDER.search(folder)
+            n, m = (int(match.group(1)), int(match.group(2))) if match else (None, None)
+            values = [path, folder, n, m, graph] + ([] if kind == 'graph' else [int(greedy)]) + [fields[c] for c in COLUMNS[kind]]
+            connection.execute('INSERT OR REPLACE INTO '+TABLES[kind]+' VALUES ('+', '.join('?' * len(values))+')', values)
+        for path in deleted:
+            connection.execute('DELETE FROM files WHERE path = ?', (path,))
+            for table in TABLES.values():
+                connection.execute('DELETE FROM '+table+' WHERE path = ?', (path,))
+    if workers != 1 and len(jobs) >= 100:
+        pool.shutdown()
+    connection.close()
+    return tuple(counts)
+
+def query(database, sql, parameters=()):
+    ''' (column names, rows) of a query of the index '''
+    connection = connect(database)
+    cursor = connection.execute(sql, parameters)
+    rows = cursor.fetchall()
+    names = [column[0] for column in cursor.description]
+    connection.close()
+    return names, rows
+
+def print_table(names, rows):
+    cells = [[name for name in names]] + [[str(round(value, 4)) if isinstance(value, float) else str(value) for value in row] for row in rows]
+    widths = [max(len(row[c]) for row in cells) for c in range(len(names))]
+    for row in cells:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Index the graphs, logs, solutions and results of a batch run tree in SQLite and query them')
+    parser.add_argument('root', help='folder of the tree, like superpack')
+    parser.add_argument('--db', help='database file (default: '+DATABASE+' in the root)')
+    parser.add_argument('--workers', type=int, help='processes parsing the files (default: one per core)')
+    parser.add_argument('--no-update', action='store_true', help='query the index without updating it first')
+    parser.add_argument('-q', '--query', choices=sorted(QUERIES), help='run one of the stored queries')
+    parser.add_argument('--sql', help='run an SQL query on the tables graphs, logs, solutions, results and the view runs')
+    args = parser.parse_args()
+
+    database = args.db or join(args.root, DATABASE)
+    if not args.no_update:
+        parsed, unchanged, deleted, failed = update(args.root, database, args.workers)
+        print('Indexed '+str(parsed)+' files, '+str(unchanged)+' unchanged, '+str(deleted)+' deleted, '+str(failed)+' unreadable')
+    for sql in ([QUERIES[args.query]] if args.query else []) + ([args.sql] if args.sql else []):
+        print_table(*query(database, sql))
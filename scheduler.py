@@ -0,0 +1,291 @@
+''' Runs the super_batch_run_linux sweep as a graph of jobs over a process pool.
+
+Every graph is a job and the greedy and non greedy solves of that graph are two
+jobs that wait for it. The cores are split between concurrent jobs, each solver
+gets --threads of them. Finished jobs are appended to a manifest in the sweep
+folder so an interrupted sweep resumes where it stopped. With a memory budget
+the solves only start while the estimated memory of the running ones leaves
+room for them, and the graphs too large for the budget get a smaller model or
+are refused (see model_size.admit). run_graphs solves the graphs of one folder
+one at a time with the same manifest, it is the loop of super_batch_run_linux.py
+and batch_run_win.py.
+'''
+import argparse
+import json
+import os
+import signal
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from os.path import abspath, dirname, join
+import ip_solver
+import model_size
+import random_graph_generator
+import solve_service
+import telemetry
+
+HERE = dirname(abspath(__file__))
+
+class Job:
+    ''' A unit of work of the sweep.
+
+    name  : unique name of the job, used in the manifest
+    kind  : 'graph' to generate a graph or 'solve' to solve it
+    args  : dict of arguments of the job
+    needs : names of the jobs that must be finished first
+    '''
+    def __init__(self, name, kind, args, needs=()):
+        self.name = name
+        self.kind = kind
+        self.args = args
+        self.needs = list(needs)
+
+def sweep_jobs(I, n1, n2, m1, m2, P, offset, folder, backend='gurobi'):
+    ''' Jobs of the super_batch_run_linux sweep, with the same file layout '''
+    jobs = []
+    for n in range(n1, n2):
+        for m in range(m1, m2):
+            subfolder = join(folder, 'n'+str(n)+'m'+str(m))
+            for i in range(I):
+                cell = 'n'+str(n)+'m'+str(m)+'/'+str(i+offset)
+                graph_filename = join(subfolder, 'random_graph_'+str(i+offset)+'.txt')
+                jobs.append(Job('graph '+cell, 'graph', {'filename': graph_filename, 'n': n, 'folder': subfolder}))
+                for greedy in (True, False):
+                    greedy_str = 'greedy' if greedy else ''
+                    prefix = join(subfolder, 'random_graph_'+str(i+offset)+'_'+greedy_str)
+                    args = {'backend': backend, 'm': m, 'M': int(P*n), 'graph_filename': graph_filename,
+                            'sol_filename': prefix+'_solution', 'log_filename': prefix+'_log.txt',
+                            'result_filename': prefix+'_result.json', 'telemetry_filename': prefix+'_telemetry.jsonl',
+                            'checkpoint_filename': prefix+'_checkpoint.json',
+                            'greedy': greedy, 'options': {},
+                            'stats_filename': join(subfolder, (greedy_str or 'not_greedy')+'_stats.txt'),
+                            'index': i}
+                    jobs.append(Job('solve '+cell+' '+(greedy_str or 'not greedy'), 'solve', args, ['graph '+cell]))
+    return jobs
+
+def run_job(job, threads, timeout):
+    ''' Runs a job in a worker process, returns (status, stats) '''
+    if job.kind == 'graph':
+        os.makedirs(job.args['folder'], exist_ok=True)
+        random_graph_generator.generate(job.args['filename'], job.args['n'])
+        return 'done', None
+    a = job.args
+    command = ip_solver.command(a['backend'], a['m'], a['M'], a['graph_filename'], a['sol_filename'], a['log_filename'],
+                                a['greedy'], a['result_filename'], threads=threads, telemetry_filename=a['telemetry_filename'],
+                                checkpoint_filename=a['checkpoint_filename'], **a['options'])
+    process = subprocess.Popen(command, shell=True, cwd=HERE, start_new_session=True)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # kill the shell and the solver it started
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        return 'timeout', ['Timeout', None, None]
+    return 'done', telemetry.read_stats(a['telemetry_filename'])
+
+def read_manifest(filename):
+    ''' Records of the finished jobs {name: record} '''
+    records = {}
+    try:
+        with open(filename) as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['job']] = record
+    except IOError:
+        pass
+    return records
+
+def model_options(name, graph_filename, m, budget, backend):
+    ''' Options of the largest model of a graph that fits in the memory budget, see model_size.admit_file
+    returns (options, estimated bytes), options is None if no model fits
+    '''
+    options, size = model_size.admit_file(graph_filename, m, budget, backend=backend)
+    if options is None:
+        print('Refusing '+name+': its smallest model needs '+model_size.gigabytes(size['bytes']))
+    elif options:
+        print('Downgrading '+name+' to the '+model_size.describe(options)+' model of '+model_size.gigabytes(size['bytes']))
+    return options, size['bytes']
+
+def admit(job, budget):
+    ''' Sets the model options and the estimated bytes of a solve job, False if no model fits in the budget '''
+    a = job.args
+    options, size = model_options(job.name, a['graph_filename'], a['m'], budget, a['backend'])
+    if options is None:
+        return False
+    a['options'], a['bytes'] = options, size
+    return True
+
+def run(jobs, manifest_filename, concurrent=1, threads=4, timeout=None, budget=None):
+    ''' Runs the jobs that are not finished in the manifest yet
+    concurrent : number of jobs running at the same time
+    threads    : number of threads of each solver
+    timeout    : seconds after which a solve is killed
+    budget     : bytes of memory the running solves may use, see admit
+    returns the manifest records
+    '''
+    records = read_manifest(manifest_filename)
+    finished = set(name for name, record in records.items() if record['status'] in ('done', 'timeout'))
+    pending = [job for job in jobs if job.name not in finished]
+    print(str(len(jobs)-len(pending))+' jobs already finished, '+str(len(pending))+' to run')
+    running = {}
+    # estimated bytes of the running solves
+    used = 0
+    with open(manifest_filename, 'a') as manifest, ProcessPoolExecutor(max_workers=concurrent) as pool:
+
+        def finish(job, status, stats):
+            print('Finished '+job.name+': '+status)
+            record = {'job': job.name, 'status': status, 'stats': stats}
+            records[job.name] = record
+            manifest.write(json.dumps(record)+'\n')
+            manifest.flush()
+            if status not in ('failed', 'refused'):
+                finished.add(job.name)
+
+        while pending or running:
+            for job in [job for job in pending if all(need in finished for need in job.needs)]:
+                if budget and job.kind == 'solve':
+                    if 'bytes' not in job.args and not admit(job, budget):
+                        pending.remove(job)
+                        finish(job, 'refused', ['Refused', None, None])
+                        continue
+                    # wait until the running solves leave room for it
+                    if used + job.args['bytes'] > budget * (1 - model_size.MARGIN):
+                        continue
+                    used += job.args['bytes']
+                pending.remove(job)
+                running[pool.submit(run_job, job, threads, timeout)] = job
+            if not running:
+                # the remaining jobs wait for jobs that failed
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                used -= job.args.get('bytes', 0)
+                try:
+                    status, stats = future.result()
+                except Exception as e:
+                    status, stats = 'failed', [str(e), None, None]
+                finish(job, status, stats)
+    return records
+
+def write_stats(jobs, records):
+    ''' Writes greedy_stats.txt and not_greedy_stats.txt of every folder in the order of the graphs '''
+    lines = {}
+    for job in jobs:
+        if job.kind == 'solve' and job.name in records:
+            lines.setdefault(job.args['stats_filename'], []).append((job.args['index'], records[job.name]['stats']))
+    for filename, stats in lines.items():
+        with open(filename, 'w') as file:
+            for index, (t, nodes, steps) in sorted(stats):
+                file.write(str(t)+','+str(nodes)+','+str(steps)+'\n')
+
+def solve_graph(i, m, M, greedy, offset, graph_filename, folder, backend='gurobi', service=None, options=None, gurobi='gurobi.sh'):
+    ''' Solves a graph of the batch runners one at a time, with ip_solver.py or the solve service, and moves the
+    files of the solve to the folder
+    gurobi : the gurobi python launcher, see ip_solver.command
+    returns (time, explored nodes, progress records) of the solve, see telemetry.read_stats
+    '''
+    print('Performing greedy '+str(greedy))
+    prefix = 'random_graph_'+str(i+offset)+'_'+('greedy' if greedy else '')
+    sol_filename = prefix+'_solution'
+    log_filename = prefix+'_log.txt'
+    result_filename = prefix+'_result.json'
+    telemetry_filename = prefix+'_telemetry.jsonl'
+    # a killed solve started again resumes from its checkpoint
+    checkpoint_filename = prefix+'_checkpoint.json'
+    if service:
+        solve_service.run(service, backend, m, M, graph_filename, sol_filename, log_filename, greedy, result_filename, telemetry_filename,
+                          checkpoint_filename, options)
+    else:
+        subprocess.call(ip_solver.command(backend, m, M, graph_filename, sol_filename, log_filename, greedy, result_filename, gurobi,
+                                          telemetry_filename=telemetry_filename, checkpoint_filename=checkpoint_filename,
+                                          **(options or {})), shell=True)
+    if folder:
+        # the solver writes its files in the working folder, the ones it did not write are skipped
+        for source, target in ((sol_filename+'.sol', sol_filename), (log_filename, log_filename), (result_filename, result_filename),
+                               (telemetry_filename, telemetry_filename), (checkpoint_filename, checkpoint_filename)):
+            try:
+                os.rename(source, folder+target)
+            except OSError:
+                pass
+    return telemetry.read_stats(folder+telemetry_filename)
+
+def run_graphs(I, n, m, M, offset, folder, backend='gurobi', service=None, budget=None, gurobi='gurobi.sh'):
+    ''' Generates I graphs of n people in the folder and solves each of them with and without the greedy start
+    one at a time, the batch runners without a process pool
+    M      : number of people to infect
+    budget : bytes of memory a solve may use, see model_options
+    gurobi : the gurobi python launcher, see ip_solver.command
+    Graphs and solves are appended to the manifest of the folder as they finish and a run started again skips
+    them, greedy_stats.txt and not_greedy_stats.txt get one line per graph.
+    '''
+    folder = folder + '/' if folder else ''
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    manifest_filename = folder+'manifest.jsonl'
+    records = read_manifest(manifest_filename)
+    manifest = open(manifest_filename, 'a')
+
+    def finished(name, stats=None, status='done'):
+        records[name] = {'job': name, 'status': status, 'stats': stats}
+        manifest.write(json.dumps(records[name])+'\n')
+        manifest.flush()
+
+    def pending(name):
+        # refused solves are tried again, the budget may have changed
+        return name not in records or records[name]['status'] == 'refused'
+
+    def solve(name, options, greedy, graph_filename, i):
+        if pending(name):
+            if options is None:
+                finished(name, ['Refused', None, None], 'refused')
+            else:
+                finished(name, solve_graph(i, m, M, greedy, offset, graph_filename, folder, backend, service, options, gurobi))
+        return records[name]['stats']
+
+    greedy_stats_file = open(folder+'greedy_stats.txt', 'w')
+    not_greedy_stats_file = open(folder+'not_greedy_stats.txt', 'w')
+    for i in range(I):
+        graph_filename = folder+'random_graph_'+str(i+offset)+'.txt'
+        cell = str(i+offset)
+        if 'graph '+cell not in records:
+            random_graph_generator.generate(graph_filename, n)
+            finished('graph '+cell)
+        options = {}
+        if budget and (pending('solve '+cell+' greedy') or pending('solve '+cell+' not greedy')):
+            options, size = model_options(graph_filename, graph_filename, m, budget, backend)
+        t_greedy, n_greedy, steps_greedy = solve('solve '+cell+' greedy', options, True, graph_filename, i)
+        t_not_greedy, n_not_greedy, steps_not_greedy = solve('solve '+cell+' not greedy', options, False, graph_filename, i)
+        greedy_stats_file.write(str(t_greedy)+','+str(n_greedy)+','+str(steps_greedy)+'\n')
+        not_greedy_stats_file.write(str(t_not_greedy)+','+str(n_not_greedy)+','+str(steps_not_greedy)+'\n')
+    greedy_stats_file.close()
+    not_greedy_stats_file.close()
+    manifest.close()
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Run the super_batch_run_linux sweep in parallel, resuming from the manifest of the folder')
+    parser.add_argument('I', type=int, help='number of iterations (min 1)')
+    parser.add_argument('n', type=int, help='starting number of people (min 2)')
+    parser.add_argument('d', type=int, help='number of different number of people increasing from n')
+    parser.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    parser.add_argument('d_m', type=int, help='number of different minimum number of friends needed to coerce an install')
+    parser.add_argument('P', type=float, help='percentage of minimum number of people who we want to have installed the app')
+    parser.add_argument('offset', type=int, help='offset the file name index')
+    parser.add_argument('folder', type=str, help='put all the output files in a folder')
+    parser.add_argument('--backend', default='gurobi', choices=sorted(ip_solver.BACKENDS), help='solver used (default: gurobi)')
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help='number of cores used by the sweep (default: all)')
+    parser.add_argument('--threads', type=int, default=4, help='number of threads of each solve (default: 4)')
+    parser.add_argument('--timeout', type=float, help='kill a solve after this many seconds')
+    parser.add_argument('--memory-budget', type=float, help='GB of memory the concurrent solves may use, graphs too large for it get a smaller model or are refused')
+    args = parser.parse_args()
+
+    folder = abspath(args.folder)
+    if args.P > 1:
+        raise Exception('M > n exception')
+    os.makedirs(folder, exist_ok=True)
+    jobs = sweep_jobs(args.I, args.n, args.n + args.d, args.m, args.m + args.d_m, args.P, args.offset, folder, args.backend)
+    concurrent = max(1, args.cores // args.threads)
+    print('Running '+str(concurrent)+' jobs at a time with '+str(args.threads)+' threads each')
+    budget = args.memory_budget * 2**30 if args.memory_budget else None
+    records = run(jobs, join(folder, 'manifest.jsonl'), concurrent, args.threads, args.timeout, budget)
+    write_stats(jobs, records)
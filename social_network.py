@@ -0,0 +1,40 @@
+''' Friendship graph files.
+
+A file holds one friendship "i j" per line, optionally after a first line
+with the number of people (as written by random_graph_generator.generate).
+Files converted with csr_graph.py are memory-mapped instead.
+'''
+from csr_graph import is_csr, load_csr
+
+def load(file):
+    ''' Reads a friendship graph
+    file : edge list file
+    returns (edges, n) where edges[i] is the set of friends of person i for i = 0,...,n-1
+    '''
+    if is_csr(file):
+        return load_csr(file)
+    edges = {}
+    n = 0
+    with open(file) as f:
+        for line in f:
+            items = line.split()
+            if not items:
+                continue
+            if len(items) == 1:
+                # header with the number of people
+                n = max(n, int(items[0]))
+                continue
+            i,j = map( lambda item: int(item), items)
+            try:
+                edges[i] |= {j}
+            except KeyError:
+                edges[i] = {j}
+            try:
+                edges[j] |= {i}
+            except KeyError:
+                edges[j] = {i}
+    if edges:
+        n = max(n, max(edges) + 1)
+    for i in range(n):
+        edges.setdefault(i, set())
+    return (edges,n)
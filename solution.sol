@@ -0,0 +1,259 @@
+<?xml version = "1.0" encoding="UTF-8" standalone="yes"?>
+<CPLEXSolution version="1.2">
+ <header
+   problemName=""
+   solutionName="incumbent"
+   solutionIndex="-1"
+   objectiveValue="14"
+   solutionTypeValue="3"
+   solutionTypeString="primal"
+   solutionStatusValue="101"
+   solutionStatusString="integer optimal solution"
+   solutionMethodString="mip"
+   primalFeasible="1"
+   dualFeasible="1"
+   MIPNodes="374"
+   MIPIterations="2180"
+   writeLevel="1"/>
+ <quality
+   epInt="1.0000000000000001e-05"
+   epRHS="9.9999999999999995e-07"
+   maxIntInfeas="0"
+   maxPrimalInfeas="0"
+   maxX="2"
+   maxSlack="3"/>
+ <linearConstraints>
+  <constraint index="0" slack="-1"/>
+  <constraint index="1" slack="0"/>
+  <constraint index="2" slack="0"/>
+  <constraint index="3" slack="0"/>
+  <constraint index="4" slack="0"/>
+  <constraint index="5" slack="0"/>
+  <constraint index="6" slack="0"/>
+  <constraint index="7" slack="0"/>
+  <constraint index="8" slack="0"/>
+  <constraint index="9" slack="0"/>
+  <constraint index="10" slack="0"/>
+  <constraint index="11" slack="0"/>
+  <constraint index="12" slack="0"/>
+  <constraint index="13" slack="0"/>
+  <constraint index="14" slack="1"/>
+  <constraint index="15" slack="0"/>
+  <constraint index="16" slack="0"/>
+  <constraint index="17" slack="0"/>
+  <constraint index="18" slack="0"/>
+  <constraint index="19" slack="0"/>
+  <constraint index="20" slack="0"/>
+  <constraint index="21" slack="0"/>
+  <constraint index="22" slack="0"/>
+  <constraint index="23" slack="0"/>
+  <constraint index="24" slack="0"/>
+  <constraint index="25" slack="0"/>
+  <constraint index="26" slack="0"/>
+  <constraint index="27" slack="0"/>
+  <constraint index="28" slack="1"/>
+  <constraint index="29" slack="0"/>
+  <constraint index="30" slack="0"/>
+  <constraint index="31" slack="0"/>
+  <constraint index="32" slack="0"/>
+  <constraint index="33" slack="0"/>
+  <constraint index="34" slack="0"/>
+  <constraint index="35" slack="0"/>
+  <constraint index="36" slack="0"/>
+  <constraint index="37" slack="0"/>
+  <constraint index="38" slack="0"/>
+  <constraint index="39" slack="0"/>
+  <constraint index="40" slack="0"/>
+  <constraint index="41" slack="0"/>
+  <constraint index="42" slack="0"/>
+  <constraint index="43" slack="1"/>
+  <constraint index="44" slack="0"/>
+  <constraint index="45" slack="0"/>
+  <constraint index="46" slack="0"/>
+  <constraint index="47" slack="0"/>
+  <constraint index="48" slack="0"/>
+  <constraint index="49" slack="0"/>
+  <constraint index="50" slack="0"/>
+  <constraint index="51" slack="0"/>
+  <constraint index="52" slack="0"/>
+  <constraint index="53" slack="0"/>
+  <constraint index="54" slack="0"/>
+  <constraint index="55" slack="0"/>
+  <constraint index="56" slack="1"/>
+  <constraint index="57" slack="0"/>
+  <constraint index="58" slack="0"/>
+  <constraint index="59" slack="0"/>
+  <constraint index="60" slack="0"/>
+  <constraint index="61" slack="0"/>
+  <constraint index="62" slack="0"/>
+  <constraint index="63" slack="0"/>
+  <constraint index="64" slack="1"/>
+  <constraint index="65" slack="0"/>
+  <constraint index="66" slack="0"/>
+  <constraint index="67" slack="0"/>
+  <constraint index="68" slack="0"/>
+  <constraint index="69" slack="0"/>
+  <constraint index="70" slack="0"/>
+  <constraint index="71" slack="0"/>
+  <constraint index="72" slack="1"/>
+  <constraint index="73" slack="1"/>
+  <constraint index="74" slack="1"/>
+  <constraint index="75" slack="1"/>
+  <constraint index="76" slack="1"/>
+  <constraint index="77" slack="1"/>
+  <constraint index="78" slack="1"/>
+  <constraint index="79" slack="2"/>
+  <constraint index="80" slack="2"/>
+  <constraint index="81" slack="2"/>
+  <constraint index="82" slack="2"/>
+  <constraint index="83" slack="2"/>
+  <constraint index="84" slack="0"/>
+  <constraint index="85" slack="2"/>
+  <constraint index="86" slack="0"/>
+  <constraint index="87" slack="0"/>
+  <constraint index="88" slack="0"/>
+  <constraint index="89" slack="0"/>
+  <constraint index="90" slack="0"/>
+  <constraint index="91" slack="0"/>
+  <constraint index="92" slack="1"/>
+  <constraint index="93" slack="2"/>
+  <constraint index="94" slack="2"/>
+  <constraint index="95" slack="2"/>
+  <constraint index="96" slack="2"/>
+  <constraint index="97" slack="2"/>
+  <constraint index="98" slack="0"/>
+  <constraint index="99" slack="2"/>
+  <constraint index="100" slack="0"/>
+  <constraint index="101" slack="0"/>
+  <constraint index="102" slack="0"/>
+  <constraint index="103" slack="0"/>
+  <constraint index="104" slack="0"/>
+  <constraint index="105" slack="0"/>
+  <constraint index="106" slack="3"/>
+  <constraint index="107" slack="1"/>
+  <constraint index="108" slack="1"/>
+  <constraint index="109" slack="1"/>
+  <constraint index="110" slack="1"/>
+  <constraint index="111" slack="1"/>
+  <constraint index="112" slack="1"/>
+  <constraint index="113" slack="0"/>
+  <constraint index="114" slack="0"/>
+  <constraint index="115" slack="0"/>
+  <constraint index="116" slack="0"/>
+  <constraint index="117" slack="0"/>
+  <constraint index="118" slack="0"/>
+  <constraint index="119" slack="0"/>
+  <constraint index="120" slack="2"/>
+  <constraint index="121" slack="2"/>
+  <constraint index="122" slack="2"/>
+  <constraint index="123" slack="2"/>
+  <constraint index="124" slack="2"/>
+  <constraint index="125" slack="2"/>
+  <constraint index="126" slack="0"/>
+  <constraint index="127" slack="2"/>
+  <constraint index="128" slack="1"/>
+  <constraint index="129" slack="1"/>
+  <constraint index="130" slack="1"/>
+  <constraint index="131" slack="1"/>
+  <constraint index="132" slack="1"/>
+  <constraint index="133" slack="1"/>
+  <constraint index="134" slack="0"/>
+  <constraint index="135" slack="0"/>
+  <constraint index="136" slack="0"/>
+  <constraint index="137" slack="0"/>
+  <constraint index="138" slack="0"/>
+  <constraint index="139" slack="0"/>
+  <constraint index="140" slack="0"/>
+  <constraint index="141" slack="0"/>
+  <constraint index="142" slack="-1"/>
+  <constraint index="143" slack="0"/>
+  <constraint index="144" slack="0"/>
+  <constraint index="145" slack="0"/>
+ </linearConstraints>
+ <variables>
+  <variable index="0" value="0"/>
+  <variable index="1" value="0"/>
+  <variable index="2" value="0"/>
+  <variable index="3" value="0"/>
+  <variable index="4" value="0"/>
+  <variable index="5" value="0"/>
+  <variable index="6" value="0"/>
+  <variable index="7" value="0"/>
+  <variable index="8" value="-0"/>
+  <variable index="9" value="-0"/>
+  <variable index="10" value="0"/>
+  <variable index="11" value="-0"/>
+  <variable index="12" value="-0"/>
+  <variable index="13" value="0"/>
+  <variable index="14" value="1"/>
+  <variable index="15" value="1"/>
+  <variable index="16" value="1"/>
+  <variable index="17" value="1"/>
+  <variable index="18" value="1"/>
+  <variable index="19" value="1"/>
+  <variable index="20" value="1"/>
+  <variable index="21" value="1"/>
+  <variable index="22" value="1"/>
+  <variable index="23" value="1"/>
+  <variable index="24" value="-0"/>
+  <variable index="25" value="0"/>
+  <variable index="26" value="-0"/>
+  <variable index="27" value="-0"/>
+  <variable index="28" value="-0"/>
+  <variable index="29" value="-0"/>
+  <variable index="30" value="1"/>
+  <variable index="31" value="1"/>
+  <variable index="32" value="1"/>
+  <variable index="33" value="1"/>
+  <variable index="34" value="1"/>
+  <variable index="35" value="1"/>
+  <variable index="36" value="1"/>
+  <variable index="37" value="1"/>
+  <variable index="38" value="1"/>
+  <variable index="39" value="1"/>
+  <variable index="40" value="-0"/>
+  <variable index="41" value="-0"/>
+  <variable index="42" value="-0"/>
+  <variable index="43" value="-0"/>
+  <variable index="44" value="-0"/>
+  <variable index="45" value="0"/>
+  <variable index="46" value="-0"/>
+  <variable index="47" value="1"/>
+  <variable index="48" value="1"/>
+  <variable index="49" value="1"/>
+  <variable index="50" value="1"/>
+  <variable index="51" value="1"/>
+  <variable index="52" value="1"/>
+  <variable index="53" value="1"/>
+  <variable index="54" value="1"/>
+  <variable index="55" value="1"/>
+  <variable index="56" value="-0"/>
+  <variable index="57" value="-0"/>
+  <variable index="58" value="0"/>
+  <variable index="59" value="-0"/>
+  <variable index="60" value="-0"/>
+  <variable index="61" value="-0"/>
+  <variable index="62" value="1"/>
+  <variable index="63" value="1"/>
+  <variable index="64" value="-0"/>
+  <variable index="65" value="-0"/>
+  <variable index="66" value="-0"/>
+  <variable index="67" value="-0"/>
+  <variable index="68" value="-0"/>
+  <variable index="69" value="0"/>
+  <variable index="70" value="0"/>
+  <variable index="71" value="1"/>
+  <variable index="72" value="0"/>
+  <variable index="73" value="0"/>
+  <variable index="74" value="0"/>
+  <variable index="75" value="0"/>
+  <variable index="76" value="0"/>
+  <variable index="77" value="0"/>
+  <variable index="78" value="0"/>
+  <variable index="79" value="0"/>
+  <variable index="80" value="2"/>
+  <variable index="81" value="-0"/>
+  <variable index="82" value="1"/>
+  <variable index="83" value="-0"/>
+ </variables>
+</CPLEXSolution>
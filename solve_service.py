@@ -0,0 +1,207 @@
+''' Long running solve service with warm worker processes.
+
+Starting python, importing a solver and initialising its environment and
+license takes longer than solving most of our graphs. The service starts a pool
+of worker processes once, each one solves a tiny model with every backend to
+get warm, and then solves the jobs sent to it over a local TCP socket.
+
+A job is one json line holding the arguments of ip_solver.run. The service
+answers with the telemetry records of the solve as json lines while it runs
+(phase, progress and solution, see telemetry.py) and ends with its 'result'
+record, or an 'error' record. A connection can send its jobs one after the other.
+'''
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+import ip_solver
+from formulation import build_formulation
+from telemetry import quiet
+
+HOST = '127.0.0.1'
+PORT = 8642
+# arguments of ip_solver.run naming files, the workers do not share the directory of the clients
+FILES = ('friends_file', 'solution_file', 'model_file', 'log_file', 'result_file', 'telemetry_file', 'activation_file', 'checkpoint_file', 'cache')
+
+# queue of the records sent by a worker to the service, set when the worker starts
+_records = None
+
+def _warm(backends, records):
+    ''' Starts a worker: solves a triangle with every backend so their environment is initialised '''
+    global _records
+    _records = records
+    edges = {0: {1, 2}, 1: {0, 2}, 2: {0, 1}}
+    with quiet():
+        for backend in backends:
+            ip_solver.get_backend(backend).solve(build_formulation(edges, 3, 3, 1, 2), threads=1)
+
+def _ready():
+    return os.getpid()
+
+def _solve(job_id, arguments):
+    ''' Runs a job in a worker, its telemetry records go back to the service '''
+    with quiet():
+        solution = ip_solver.run(listener=lambda record: _records.put((job_id, record)), **arguments)
+    return solution.to_dict()
+
+class Service:
+    ''' Pool of warm workers solving the jobs sent over a socket
+
+    workers  : number of worker processes (default: one per core)
+    backends : backends initialised by every worker when it starts
+    '''
+    def __init__(self, workers=None, backends=('gurobi',)):
+        self.workers = workers or os.cpu_count()
+        self.records = multiprocessing.Queue()
+        # job id -> asyncio queue of the records of the job
+        self.jobs = {}
+        self.next_job = 0
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_warm, initargs=(list(backends), self.records))
+        # the pool only starts its workers when it gets work
+        wait([self.pool.submit(_ready) for i in range(self.workers)])
+
+    def _dispatch(self, loop):
+        ''' Hands the records sent by the workers to the jobs waiting for them, in its own thread '''
+        while True:
+            item = self.records.get()
+            if item is None:
+                return
+            job_id, record = item
+            records = self.jobs.get(job_id)
+            if records:
+                loop.call_soon_threadsafe(records.put_nowait, record)
+
+    async def solve(self, arguments):
+        ''' Yields the records of a job as the worker sends them, the last one is 'result' or 'error' '''
+        loop = asyncio.get_running_loop()
+        job_id = self.next_job
+        self.next_job += 1
+        records = self.jobs[job_id] = asyncio.Queue()
+
+        def failed(future):
+            if future.exception():
+                loop.call_soon_threadsafe(records.put_nowait, {'event': 'error', 'message': repr(future.exception())})
+
+        self.pool.submit(_solve, job_id, arguments).add_done_callback(failed)
+        try:
+            while True:
+                record = await records.get()
+                yield record
+                if record['event'] in ('result', 'error'):
+                    return
+        finally:
+            del self.jobs[job_id]
+
+    async def handle(self, reader, writer):
+        ''' Serves the jobs of a connection, one json line each '''
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                arguments = json.loads(line)
+            except ValueError as e:
+                writer.write((json.dumps({'event': 'error', 'message': 'bad job: '+str(e)})+'\n').encode())
+                continue
+            async for record in self.solve(arguments):
+                writer.write((json.dumps(record)+'\n').encode())
+                await writer.drain()
+        writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        threading.Thread(target=self._dispatch, args=(asyncio.get_running_loop(),), daemon=True).start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print('Serving on '+host+':'+str(port)+' with '+str(self.workers)+' workers')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.records.put(None)
+            self.pool.shutdown()
+
+def job(m, M, friends_file, **options):
+    ''' Arguments of ip_solver.run for a job, with the paths of its files made absolute '''
+    arguments = dict(options, m=m, M=M, friends_file=friends_file)
+    for name in FILES:
+        if arguments.get(name):
+            arguments[name] = os.path.abspath(arguments[name])
+    return arguments
+
+async def request(arguments, host=HOST, port=PORT):
+    ''' Sends a job to the service and yields its records, see job '''
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps(arguments)+'\n').encode())
+    await writer.drain()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('the service closed the connection')
+            record = json.loads(line)
+            yield record
+            if record['event'] in ('result', 'error'):
+                return
+    finally:
+        writer.close()
+
+def submit(arguments, address=(HOST, PORT), progress=None):
+    ''' Solves a job with the service and returns its result record
+    progress : function called with the other records of the job
+    '''
+    async def collect():
+        async for record in request(arguments, *address):
+            if record['event'] == 'error':
+                raise RuntimeError(record['message'])
+            if record['event'] == 'result':
+                return record
+            if progress:
+                progress(record)
+    return asyncio.run(collect())
+
+def run(address, backend, m, M, graph_filename, sol_filename, log_filename, greedy, result_filename=None, telemetry_filename=None, checkpoint_filename=None, options=None):
+    ''' Solves one graph of a batch runner with the service, writing the same files as the shell
+    command ip_solver.command
+    options : other arguments of ip_solver.run (compact, lazy, see model_size.admit)
+    '''
+    arguments = job(m, M, graph_filename, backend=backend, solution_file=sol_filename+'.sol', log_file=log_filename,
+                    greedy='degree' if greedy else None, result_file=result_filename, telemetry_file=telemetry_filename,
+                    checkpoint_file=checkpoint_filename, **(options or {}))
+    return submit(arguments, address)
+
+def parse_address(text):
+    ''' (host, port) of a 'host:port' argument '''
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+def print_record(record):
+    print(record['event']+' '+json.dumps({key: value for key, value in record.items() if key != 'event'}))
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Solve jobs with warm worker processes, or send a job to the service')
+    parser.add_argument('--address', default=HOST+':'+str(PORT), help='host:port of the service (default: '+HOST+':'+str(PORT)+')')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='start the service')
+    serve.add_argument('--workers', type=int, help='number of worker processes (default: one per core)')
+    serve.add_argument('--backends', nargs='+', default=['gurobi'], choices=sorted(ip_solver.BACKENDS), help='backends initialised by the workers (default: gurobi)')
+    solve = commands.add_parser('solve', help='send a job to the service and print its records')
+    solve.add_argument('m', type=int, help='minimum number of friends needed to coerce an install')
+    solve.add_argument('M', type=int, help='minimum number of people who we want to have installed the app')
+    solve.add_argument('friends_file', help='file defining the social network')
+    solve.add_argument('--backend', default='gurobi', choices=sorted(ip_solver.BACKENDS), help='solver used (default: gurobi)')
+    solve.add_argument('--threads', type=int, default=4, help='number of threads used by the solver (default: 4)')
+    solve.add_argument('--greedy', nargs='?', const='degree', help='MIP start (degree, celf or search)')
+    solve.add_argument('-r', '--result', help='write the result to a json file')
+    solve.add_argument('--no-cache', action='store_true', help='solve even if the result is in the cache')
+    args = parser.parse_args()
+
+    host, port = parse_address(args.address)
+    if args.command == 'serve':
+        asyncio.run(Service(args.workers, args.backends).serve(host, port))
+    else:
+        options = {'backend': args.backend, 'threads': args.threads, 'greedy': args.greedy, 'result_file': args.result}
+        if args.no_cache:
+            options['cache'] = None
+        print_record(submit(job(args.m, args.M, args.friends_file, **options), (host, port), print_record))
@@ -0,0 +1,83 @@
+''' Solves one graph for many m and M in a single process.
+
+The model is built once per m. Changing M only changes the cost of the seeds,
+the bound of d and the right hand side of RequiredNumberOfPeople, which every
+backend updates in place (retarget). The values of M are solved from the
+largest down so each solution still infects enough people for the next M and
+warm starts its solve.
+'''
+import argparse
+import json
+from time import time
+from formulation import build_formulation
+from greedy import GREEDY_STRATEGIES
+from horizon import estimate_horizon
+from ip_solver import BACKENDS, LAZY_BACKENDS, get_backend, print_solution
+from social_network import load
+
+def sweep(friends_file, ms, Ms, backend='gurobi', horizon='safe', reduce=True, greedy=None, lazy=False, threads=4, memory=False, log_file=None, result_file=None, compact=False):
+    ''' Solves the problem on one graph for every m in ms and M in Ms
+    horizon     : 'safe', 'full' or a number of periods, see horizon.estimate_horizon
+    greedy      : greedy strategy used for the MIP start of the first solve of each m
+    result_file : json lines file with one result per (m, M)
+    compact     : use the model without the y variables, see formulation.build_formulation
+    returns {(m, M): formulation.Solution}
+    '''
+    solver = get_backend(backend)
+    edges,n = load(friends_file)
+    results = {}
+    output = open(result_file, 'w') if result_file else None
+    for m in ms:
+        targets = sorted(Ms, reverse=True)
+        start = time()
+        T = estimate_horizon(edges, n, m, horizon)
+        formulation = build_formulation(edges, n, targets[0], m, T, reduce, greedy, lazy, compact=compact)
+        model = solver.to_model(formulation)
+        solver.setup(model, log_file, memory, threads)
+        build = time() - start
+        print('Built the model of m = '+str(m)+' in '+str(round(build, 3))+' seconds')
+
+        previous = None
+        for M in targets:
+            print('Solving m = '+str(m)+', M = '+str(M))
+            if M != formulation.M:
+                solver.retarget(model, formulation, M)
+            if previous is not None:
+                solver.warm_start(model, previous)
+            solution = solver.optimize(model, formulation)
+            solution.stats['build'] = build
+            print_solution(solution)
+            results[(m, M)] = solution
+            if solution.values is not None:
+                previous = solution.values
+            if output:
+                record = {'m': m, 'M': M}
+                record.update(solution.to_dict())
+                output.write(json.dumps(record)+'\n')
+                output.flush()
+        solver.close(model)
+    if output:
+        output.close()
+    return results
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Solve the advertisement spreading problem on one graph for several m and M, reusing the model')
+    parser.add_argument('friends_file', help='file defining the social network')
+    parser.add_argument('-m', type=int, nargs='+', required=True, help='minimum numbers of friends needed to coerce an install')
+    parser.add_argument('-M', type=int, nargs='+', required=True, help='minimum numbers of people who we want to have installed the app')
+    parser.add_argument('-l', '--log', help='log file of the solver')
+    parser.add_argument('-r', '--result', help='write one json line per (m, M) to this file')
+    parser.add_argument('--backend', default='gurobi', choices=sorted(BACKENDS), help='solver used (default: gurobi)')
+    parser.add_argument('--threads', type=int, default=4, help='number of threads used by the solver (default: 4)')
+    parser.add_argument('--memory', action='store_true', help='store the branch and bound nodes on disk to reduce memory usage')
+    parser.add_argument('--horizon', default='safe', help='number of periods: safe (default), full or a number')
+    parser.add_argument('--lazy', action='store_true', help='add the big-M Link2 rows lazily')
+    parser.add_argument('--compact', action='store_true', help='model without the y variables')
+    parser.add_argument('--no-presolve', action='store_true', help='build the model over the whole graph without the presolve')
+    parser.add_argument('--greedy', nargs='?', const='degree', choices=sorted(GREEDY_STRATEGIES), help='MIP start of the first solve of each m (default: degree)')
+    args = parser.parse_args()
+    if args.lazy and args.backend not in LAZY_BACKENDS:
+        parser.error('--lazy needs a backend with lazy constraint callbacks: '+', '.join(LAZY_BACKENDS))
+
+    sweep(args.friends_file, args.m, args.M, args.backend, args.horizon, not args.no_presolve, args.greedy,
+          args.lazy, args.threads, args.memory, args.log, args.result, args.compact)
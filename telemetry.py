@@ -0,0 +1,192 @@
+''' Structured progress of a run, written as json lines.
+
+Every record has an 'event' and the 'time' in seconds since the run started:
+  phase    : a phase ended, with its 'name' and 'seconds', the 'columns', 'rows' and
+             'nonzeros' it added to the model, and with memory tracing the bytes it
+             'allocated' (still held at the end) and its 'peak' above the start
+  progress : solver progress from its callback, with 'incumbent', 'bound', 'gap',
+             'nodes' and 'iterations' (None when the solver does not know them yet)
+  solution : the solver found a better incumbent 'objective', with its 'seeds' when the
+             backend reads them from its callback
+  result   : the final formulation.Solution.to_dict() fields and 'cached'
+The records replace parsing the solver logs, see read_stats.
+'''
+import json
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from time import time
+
+class Telemetry:
+    ''' Records of a run, kept in memory and appended to a file if there is one
+
+    interval : minimum seconds between two progress records, incumbents are always recorded
+    memory   : trace the memory allocated by python in every phase with tracemalloc (slower)
+    listener : function called with every record, to stream them elsewhere, see listen
+    '''
+    def __init__(self, filename=None, interval=1.0, memory=False, listener=None):
+        self.records = []
+        self.interval = interval
+        self.memory = memory
+        self.listeners = [listener] if listener else []
+        self.start = time()
+        self._last_progress = None
+        self._incumbent = None
+        # [memory at the start, peak] of the phases running, outermost first
+        self._stack = []
+        self._file = open(filename, 'w') if filename else None
+        # only stop the tracing we started
+        self._tracing = memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def record(self, event, **fields):
+        record = {'event': event, 'time': time() - self.start}
+        record.update(fields)
+        self.records.append(record)
+        if self._file:
+            self._file.write(json.dumps(record)+'\n')
+            self._file.flush()
+        for listener in self.listeners:
+            listener(record)
+        return record
+
+    def listen(self, listener):
+        ''' Also calls the listener with every record from now on '''
+        self.listeners.append(listener)
+
+    @contextmanager
+    def phase(self, name):
+        ''' Records the duration of the code run in the with block, phases can be nested
+        yields a dict where the block can put the 'columns', 'rows' and 'nonzeros' it added
+        '''
+        fields = {}
+        if self.memory:
+            self._fold_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            self._stack.append([current, current])
+        start = time()
+        yield fields
+        seconds = time() - start
+        if self.memory:
+            self._fold_peak()
+            begin, peak = self._stack.pop()
+            fields['allocated'] = tracemalloc.get_traced_memory()[0] - begin
+            fields['peak'] = peak - begin
+        self.record('phase', name=name, seconds=seconds, **fields)
+
+    def _fold_peak(self):
+        ''' Moves the peak traced so far into the running phases '''
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+
+    def phases(self):
+        ''' The phase records, in the order they ended '''
+        return [record for record in self.records if record['event'] == 'phase']
+
+    def progress(self, incumbent, bound, nodes, iterations, force=False):
+        ''' Records the progress of the solver at most once every interval seconds,
+        and every better incumbent
+        '''
+        self.incumbent(incumbent)
+        now = time()
+        if not force and self._last_progress is not None and now - self._last_progress < self.interval:
+            return
+        self._last_progress = now
+        self.record('progress', incumbent=incumbent, bound=bound, gap=gap(incumbent, bound),
+                    nodes=nodes, iterations=iterations)
+
+    def improves(self, objective):
+        ''' True if the objective is better than the incumbents recorded so far '''
+        return objective is not None and (self._incumbent is None or objective < self._incumbent)
+
+    def incumbent(self, objective, seeds=None):
+        ''' Records a better incumbent, with its seeds if the solver gave them '''
+        if not self.improves(objective):
+            return
+        self._incumbent = objective
+        if seeds is None:
+            self.record('solution', objective=objective)
+        else:
+            self.record('solution', objective=objective, seeds=seeds)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+@contextmanager
+def quiet():
+    ''' Sends the output of python and of the solver libraries to /dev/null '''
+    sys.stdout.flush()
+    saved = os.dup(1)
+    null = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(null, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(null)
+        os.close(saved)
+
+def phase(telemetry, name):
+    ''' telemetry.phase(name), or nothing without telemetry '''
+    return telemetry.phase(name) if telemetry else nullcontext()
+
+def size(fields, rows=None, columns=None):
+    ''' Puts the number of columns, rows and nonzeros in the fields yielded by phase
+    rows : list of (indices, values)
+    '''
+    if fields is None:
+        return
+    if columns is not None:
+        fields['columns'] = columns
+    if rows is not None:
+        fields['rows'] = len(rows)
+        fields['nonzeros'] = sum(len(indices) for indices, values in rows)
+
+def print_phases(records):
+    ''' Prints a table of phase records '''
+    print('%-44s %10s %12s %12s %10s %10s %10s' % ('phase', 'seconds', 'allocated', 'peak', 'columns', 'rows', 'nonzeros'))
+    for record in records:
+        print('%-44s %10.4f %12s %12s %10s %10s %10s' % tuple([record['name'], record['seconds']] +
+              [record.get(field, '') for field in ('allocated', 'peak', 'columns', 'rows', 'nonzeros')]))
+
+def gap(incumbent, bound):
+    ''' Relative gap of a minimisation, None without an incumbent '''
+    if incumbent is None or bound is None:
+        return None
+    if incumbent == 0:
+        return 0.0 if bound == 0 else None
+    return abs(incumbent - bound) / abs(incumbent)
+
+def read(filename):
+    ''' Records of a telemetry file, an empty list if there is none '''
+    records = []
+    try:
+        with open(filename) as file:
+            for line in file:
+                if line.strip():
+                    records.append(json.loads(line))
+    except IOError:
+        pass
+    return records
+
+def read_stats(filename):
+    ''' (time, explored nodes, progress records) of a run like gurobi_log_parser.parse,
+    ['Infeasible', None, None] without a solution
+    '''
+    records = read(filename)
+    results = [record for record in records if record['event'] == 'result']
+    if not results or results[-1]['seeds'] is None:
+        return ['Infeasible', None, None]
+    stats = results[-1]['stats']
+    steps = sum(1 for record in records if record['event'] == 'progress')
+    return [stats['time'], stats['nodes'], steps]
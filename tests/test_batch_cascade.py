@@ -0,0 +1,24 @@
+from random import Random
+import pytest
+from cascade import simulate
+from random_graph_generator import gnp_edges
+
+pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+import batch_cascade
+
+def test_batch_matches_simulate():
+    rng = Random(0)
+    for case in range(40):
+        n = rng.randint(1, 40)
+        edges = {i: set() for i in range(n)}
+        for i, j in gnp_edges(n, rng.uniform(0, 0.3), rng):
+            edges[i].add(j)
+            edges[j].add(i)
+        m = rng.randint(0, 3)
+        seed_sets = [rng.sample(range(n), rng.randint(0, n)) for k in range(rng.randint(1, 10))]
+        coverage, activation = batch_cascade.simulate(edges, batch_cascade.seed_matrix(seed_sets, n), m, n)
+        for c, seeds in enumerate(seed_sets):
+            infected, steps = simulate(edges, seeds, m, n)
+            assert coverage[c] == infected
+            assert activation[:, c].tolist() == [-1 if step is None else step for step in steps]
@@ -0,0 +1,53 @@
+from random import Random
+from cascade import Cascade, simulate
+from random_graph_generator import gnp_edges
+
+def infected_people(activation):
+    return set(i for i, step in enumerate(activation) if step is not None)
+
+def test_add_remove_and_gain_match_simulate():
+    rng = Random(0)
+    for case in range(60):
+        n = rng.randint(1, 40)
+        edges = {i: set() for i in range(n)}
+        for i, j in gnp_edges(n, rng.uniform(0, 0.3), rng):
+            edges[i].add(j)
+            edges[j].add(i)
+        m = rng.randint(0, 3)
+        cascade = Cascade(edges, m, n)
+        for move in range(30):
+            seeds = sorted(cascade.seeds)
+            if seeds and rng.random() < 0.4:
+                cascade.remove(rng.sample(seeds, rng.randint(1, len(seeds))))
+            else:
+                people = rng.sample(range(n), rng.randint(1, min(3, n)))
+                infected, activation = simulate(edges, seeds + people, m, n)
+                assert cascade.gain(people) == infected - cascade.infected
+                cascade.add(people)
+            infected, activation = simulate(edges, cascade.seeds, m, n)
+            assert cascade.infected == infected
+            assert infected_people(cascade.activation) == infected_people(activation)
+            # every infected person who is not a seed has m friends infected on an earlier step
+            for i in infected_people(cascade.activation) - cascade.seeds:
+                if m > 0:
+                    assert sum(1 for j in edges[i] if cascade.activation[j] is not None and cascade.activation[j] < cascade.activation[i]) >= m
+
+def test_gain_footprint():
+    rng = Random(1)
+    for case in range(60):
+        n = rng.randint(2, 30)
+        edges = {i: set() for i in range(n)}
+        for i, j in gnp_edges(n, rng.uniform(0, 0.3), rng):
+            edges[i].add(j)
+            edges[j].add(i)
+        m = rng.randint(1, 3)
+        cascade = Cascade(edges, m, n)
+        cascade.add(rng.sample(range(n), rng.randint(0, n // 2)))
+        person = rng.randrange(n)
+        footprint = set()
+        gain = cascade.gain([person], footprint)
+        infected, activation = simulate(edges, list(cascade.seeds) + [person], m, n)
+        reached = infected_people(activation) - infected_people(cascade.activation)
+        assert gain == len(reached)
+        # the people the seed infects and their friends not infected yet
+        assert footprint == reached | set(j for i in reached for j in edges[i] if cascade.activation[j] is None)
@@ -0,0 +1,55 @@
+from itertools import product
+from random import Random
+from decomposition import closed_curve, combine, components
+from random_graph_generator import gnp_edges
+
+def random_curve(rng):
+    ''' Curve starting with no seeds, more seeds reaching more people on every point '''
+    curve = [([], {})]
+    seeds = reached = 0
+    for point in range(rng.randint(0, 4)):
+        seeds += rng.randint(1, 2)
+        reached = max(reached + 1, seeds) + rng.randint(0, 3)
+        curve.append((list(range(seeds)), dict.fromkeys(range(reached), 1)))
+    return curve
+
+def test_combine_matches_brute_force():
+    rng = Random(0)
+    for case in range(300):
+        curves = [random_curve(rng) for c in range(rng.randint(1, 4))]
+        m = rng.randint(0, 4)
+        M = rng.randint(0, sum(len(curve[-1][1]) for curve in curves) + 1)
+        # every pick of a point per curve with its seeds and people reached
+        picks = [(sum(len(curve[j][0]) for curve, j in zip(curves, pick)), sum(len(curve[j][1]) for curve, j in zip(curves, pick)))
+                 for pick in product(*[range(len(curve)) for curve in curves])]
+        feasible = [s for s, r in picks if r >= M]
+        chosen = combine(curves, m, M)
+        if not feasible:
+            assert chosen is None
+            continue
+        pick, count = chosen
+        assert count == max(m, min(feasible))
+        seeds = sum(len(curve[j][0]) for curve, j in zip(curves, pick))
+        reached = sum(len(curve[j][1]) for curve, j in zip(curves, pick))
+        assert seeds <= count
+        assert reached == max(r for s, r in picks if s <= count)
+
+def test_components_cover_everybody():
+    rng = Random(1)
+    for case in range(50):
+        n = rng.randint(1, 30)
+        edges = {i: set() for i in range(n)}
+        for i, j in gnp_edges(n, rng.uniform(0, 0.2), rng):
+            edges[i].add(j)
+            edges[j].add(i)
+        parts = components(edges, n)
+        assert sorted(i for people in parts for i in people) == list(range(n))
+        for people in parts:
+            members = set(people)
+            assert all(j in members for i in people for j in edges[i])
+
+def test_closed_curve_of_small_cliques():
+    edges = {0: {1}, 1: {0}}
+    assert [len(seeds) for seeds, activation in closed_curve(edges, [0, 1], 3)] == [0, 1, 2]
+    assert [len(activation) for seeds, activation in closed_curve(edges, [0, 1], 1)] == [0, 2]
+    assert [len(activation) for seeds, activation in closed_curve({0: set()}, [0], 2)] == [0, 1]
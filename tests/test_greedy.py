@@ -0,0 +1,33 @@
+from random import Random
+from cascade import Cascade
+from greedy import find_celf_solution
+
+def random_graph(rng, n, p):
+    edges = {i: set() for i in range(n)}
+    for i in range(n):
+        for j in range(i+1, n):
+            if rng.random() < p:
+                edges[i].add(j)
+                edges[j].add(i)
+    return edges
+
+def brute_force_greedy(edges, f, m, M):
+    ''' Greedy evaluating the gain of every person on every round, ties broken like CELF '''
+    n = len(edges)
+    solution = [0] * n
+    cascade = Cascade(edges, m, n)
+    while cascade.infected < M:
+        gain, friends, person = min((-cascade.gain([i]), -f[i], i) for i in range(n) if cascade.activation[i] is None)
+        solution[person] = 1
+        cascade.add([person])
+    return solution
+
+def test_celf_picks_the_greedy_seeds():
+    rng = Random(0)
+    for graph in range(100):
+        n = rng.randint(20, 60)
+        edges = random_graph(rng, n, rng.uniform(0.02, 0.2))
+        f = [len(edges[i]) for i in range(n)]
+        m = rng.randint(1, 4)
+        M = rng.randint(1, n)
+        assert find_celf_solution(edges, f, m, M) == brute_force_greedy(edges, f, m, M)